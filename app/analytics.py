@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import Float, Integer, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from . import crud, models
+
+
+@dataclass
+class Series:
+    """A user's journal over a date range as parallel arrays, one element per row, sorted by date."""
+    dates: np.ndarray     # datetime64[D]
+    profit: np.ndarray
+    loss: np.ndarray
+    flow: np.ndarray      # deposits positive, withdrawals negative
+    is_entry: np.ndarray  # True for daily entry rows
+    opening: float = 0.0  # balance before the first row
+
+
+def load_series(db: Session, user_id: int, date_from: Optional[date] = None,
+                date_to: Optional[date] = None) -> Series:
+    """Fetch the daily entries and cash flows between ``date_from`` and ``date_to``.
+
+    The opening balance comes from the ledger's balance the day before
+    ``date_from``; within the range, cash flows are a ledger index range scan
+    and profit and loss a daily entry index range scan, in a single query.
+    """
+    opening = 0.0
+    # Nothing can be dated before date.min, whose previous day does not exist
+    if date_from is not None and date_from > date.min:
+        opening = float(crud.get_balance(db, user_id, date_from - timedelta(days=1)))
+    zero = literal(0.0, Float)
+    entries = models.DailyEntry
+    ledger = models.LedgerEntry
+    parts = [
+        select(entries.date, entries.profit, entries.loss, zero, literal(1, Integer))
+        .where(entries.user_id == user_id),
+        select(ledger.effective_date, zero, zero, ledger.amount, literal(0, Integer))
+        .where(ledger.user_id == user_id, ledger.entry_type != "daily_entry"),
+    ]
+    if date_from is not None:
+        parts = [part.where(part.selected_columns[0] >= date_from) for part in parts]
+    if date_to is not None:
+        parts = [part.where(part.selected_columns[0] <= date_to) for part in parts]
+    journal = union_all(*parts).subquery()
+    rows = db.execute(select(journal).order_by(journal.c[0])).all()
+
+    if not rows:
+        empty = np.array([], dtype=float)
+        return Series(np.array([], dtype="datetime64[D]"), empty, empty, empty, np.array([], dtype=bool), opening)
+    dates, profit, loss, flow, is_entry = zip(*rows)
+    return Series(
+        dates=np.array(dates, dtype="datetime64[D]"),
+        profit=np.array(profit, dtype=float),
+        loss=np.array(loss, dtype=float),
+        flow=np.array(flow, dtype=float),
+        is_entry=np.array(is_entry, dtype=bool),
+        opening=opening,
+    )
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    if not mask.any():
+        return 0
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def _ratio(numerator: float, denominator: float) -> Optional[float]:
+    return float(numerator / denominator) if denominator else None
+
+
+def compute_metrics(series: Series) -> dict:
+    """Compute equity curve and performance statistics over the series.
+
+    Deposits and withdrawals are treated as happening at the start of their
+    day, so the time-weighted return and percentage drawdown measure trading
+    performance independently of cash flows.
+    """
+    days, starts = np.unique(series.dates, return_index=True)
+    if len(days):
+        profit = np.add.reduceat(series.profit, starts)
+        loss = np.add.reduceat(series.loss, starts)
+        flow = np.add.reduceat(series.flow, starts)
+        entry_day = np.add.reduceat(series.is_entry.astype(np.int64), starts) > 0
+    else:
+        profit = loss = flow = np.array([], dtype=float)
+        entry_day = np.array([], dtype=bool)
+    pnl = profit - loss
+    opening = series.opening
+    balance = opening + np.cumsum(flow + pnl)
+
+    # Time-weighted return: chain daily returns on the start-of-day balance
+    base = np.concatenate(([opening], balance[:-1])) + flow
+    returns = np.divide(pnl, base, out=np.zeros_like(pnl), where=base > 0)
+    growth = np.cumprod(1.0 + returns)
+    growth_peak = np.maximum.accumulate(np.concatenate(([1.0], growth)))[1:]
+
+    cumulative_pnl = np.cumsum(pnl)
+    pnl_peak = np.maximum.accumulate(np.concatenate(([0.0], cumulative_pnl)))[1:]
+
+    traded = pnl[entry_day]
+    wins = traded > 0
+    losses = traded < 0
+    win_count, loss_count = int(wins.sum()), int(losses.sum())
+    avg_win = traded[wins].mean() if win_count else 0.0
+    avg_loss = -traded[losses].mean() if loss_count else 0.0
+
+    return {
+        "opening_balance": opening,
+        "closing_balance": float(balance[-1]) if len(balance) else opening,
+        "net_pnl": float(pnl.sum()),
+        "net_flows": float(flow.sum()),
+        "equity_curve": {
+            "dates": [str(d) for d in days],
+            "balance": balance.round(2).tolist(),
+        },
+        "max_drawdown": float((pnl_peak - cumulative_pnl).max()) if len(pnl) else 0.0,
+        "max_drawdown_pct": float(1.0 - (growth / growth_peak).min()) if len(growth) else 0.0,
+        "trading_days": int(entry_day.sum()),
+        "winning_days": win_count,
+        "losing_days": loss_count,
+        "win_rate": _ratio(win_count, win_count + loss_count),
+        "win_loss_ratio": _ratio(avg_win, avg_loss),
+        "profit_factor": _ratio(profit.sum(), loss.sum()),
+        "longest_win_streak": _longest_run(wins),
+        "longest_loss_streak": _longest_run(losses),
+        "time_weighted_return": float(growth[-1] - 1.0) if len(growth) else 0.0,
+    }
+
+
+def get_analytics(db: Session, user_id: int, date_from: Optional[date] = None,
+                  date_to: Optional[date] = None) -> dict:
+    result = compute_metrics(load_series(db, user_id, date_from, date_to))
+    result["from"] = date_from.isoformat() if date_from else None
+    result["to"] = date_to.isoformat() if date_to else None
+    return result
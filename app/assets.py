@@ -0,0 +1,99 @@
+from dataclasses import dataclass, field
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+
+try:  # optional dependency for Brotli-compressed assets
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+@dataclass
+class Asset:
+    body: bytes
+    media_type: str
+    digest: str
+    encoded: dict = field(default_factory=dict)  # content-coding -> compressed body
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticAssets(StaticFiles):
+    """StaticFiles that also serves content-hashed, precompressed copies of every file.
+
+    ``url("css/style.css")`` returns ``/static/css/style.<digest>.css``; that URL
+    is served from memory with immutable cache headers and gzip or brotli
+    encoding as negotiated. The original paths keep StaticFiles' behaviour.
+    """
+
+    def __init__(self, directory: str, prefix: str = "/static"):
+        super().__init__(directory=directory)
+        self.prefix = prefix
+        self.assets = {}  # hashed path -> Asset
+        self.urls = {}    # original path -> hashed path
+        self.load(directory)
+        self.version = hashlib.sha256(
+            "".join(sorted(a.digest for a in self.assets.values())).encode()
+        ).hexdigest()[:12]
+
+    def load(self, directory: str):
+        for root, _, files in os.walk(directory):
+            for name in files:
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, directory)
+                with open(full_path, "rb") as f:
+                    body = f.read()
+                digest = hashlib.sha256(body).hexdigest()[:12]
+                stem, ext = os.path.splitext(path)
+                hashed = f"{stem}.{digest}{ext}"
+                media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+                asset = Asset(body=body, media_type=media_type, digest=digest)
+                if media_type.startswith(COMPRESSIBLE_TYPES):
+                    asset.encoded["gzip"] = gzip.compress(body, compresslevel=9, mtime=0)
+                    if brotli is not None:
+                        asset.encoded["br"] = brotli.compress(body)
+                self.assets[hashed] = asset
+                self.urls[path] = hashed
+
+    def url(self, path: str) -> str:
+        return f"{self.prefix}/{self.urls.get(path, path)}"
+
+    async def get_response(self, path: str, scope) -> Response:
+        asset = self.assets.get(path)
+        if asset is None:
+            return await super().get_response(path, scope)
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        request_headers = Headers(scope=scope)
+        etag = f'"{asset.digest}"'
+        headers = {"Cache-Control": IMMUTABLE, "ETag": etag, "Vary": "Accept-Encoding"}
+        if etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        body = asset.body
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in asset.encoded:
+                body = asset.encoded[encoding]
+                headers["Content-Encoding"] = encoding
+                break
+        return Response(body, media_type=asset.media_type, headers=headers)
@@ -1,15 +1,19 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple, Union
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status, Cookie
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 import os
+import time
 from dotenv import load_dotenv
 
-from . import models, schemas, crud
+from . import models, schemas, crud, profiling
 from .database import get_db
+from .cache import TTLCache
+from .concurrency import run_db
+from .hashing import password_hasher, pwd_context
 
 load_dotenv()
 
@@ -18,20 +22,25 @@ SECRET_KEY = os.getenv("JWT_SECRET")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Short-lived per-process cache of authenticated identities
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "30"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    print(f"Verifying password...")
-    result = pwd_context.verify(plain_password, hashed_password)
-    print(f"Password verification result: {result}")
-    return result
+    return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    print(f"Hashing password...")
-    hashed = pwd_context.hash(password)
-    print(f"Password hashed successfully")
-    return hashed
+    return pwd_context.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing worker pool without blocking the event loop."""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing worker pool without blocking the event loop."""
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -43,38 +52,103 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Immutable view of the authenticated user, safe to cache across requests."""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: models.User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            is_active=user.is_active if user.is_active is not None else True,
+        )
+
+# Decoded tokens (token -> (exp, subject)) and user snapshots (id -> snapshot)
+token_cache = TTLCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+identity_cache = TTLCache(IDENTITY_CACHE_SIZE, IDENTITY_CACHE_TTL)
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached user snapshot, e.g. after deactivation or a data reset."""
+    identity_cache.pop(user_id)
+
+def identity_cache_stats() -> dict:
+    return {
+        "token_hit_ratio": token_cache.hit_ratio,
+        "user_hits": identity_cache.hits,
+        "user_misses": identity_cache.misses,
+        "user_hit_ratio": identity_cache.hit_ratio,
+        "user_size": len(identity_cache),
+    }
+
+def _decode_subject(token: str) -> Optional[Tuple[str, Union[int, str]]]:
+    cached = token_cache.get(token)
+    if cached is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            return None
+        subject = payload.get("sub")
+        if subject is None:
+            return None
+        # Tokens issued before the switch to user ids carry the username
+        if payload.get("sub_type") == "user_id":
+            cached = (payload["exp"], ("id", int(subject)))
+        else:
+            cached = (payload["exp"], ("username", subject))
+        token_cache.set(token, cached)
+    expires, subject = cached
+    if expires <= time.time():
+        token_cache.pop(token)
+        return None
+    return subject
+
+async def authenticate_token(access_token: Optional[str], db: Session) -> Optional[UserSnapshot]:
+    """Resolve an access token cookie to a user snapshot, or None if invalid."""
+    if not access_token:
+        return None
+    # Remove 'Bearer ' prefix if present
+    if access_token.startswith('Bearer '):
+        access_token = access_token[7:]
+
+    subject = _decode_subject(access_token)
+    if subject is None:
+        return None
+    kind, value = subject
+
+    if kind == "id":
+        snapshot = identity_cache.get(value)
+        if snapshot is not None:
+            return snapshot
+        user = await run_db(crud.get_user, db, value)
+    else:
+        user = await run_db(crud.get_user_by_username, db, username=value)
+    if user is None:
+        return None
+    snapshot = UserSnapshot.from_user(user)
+    identity_cache.set(snapshot.id, snapshot)
+    return snapshot
+
 async def get_current_user(
     access_token: Optional[str] = Cookie(None, alias="access_token"),
     db: Session = Depends(get_db)
 ):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
-    if not access_token:
-        raise credentials_exception
-        
-    try:
-        # Remove 'Bearer ' prefix if present
-        if access_token.startswith('Bearer '):
-            access_token = access_token[7:]
-            
-        payload = jwt.decode(access_token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = crud.get_user_by_username(db, username=username)
+    with profiling.timed("auth"):
+        user = await authenticate_token(access_token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
-    # If is_active field doesn't exist, consider user active
-    if not hasattr(current_user, 'is_active') or current_user.is_active:
+async def get_current_active_user(current_user: UserSnapshot = Depends(get_current_user)):
+    if current_user.is_active:
         return current_user
-    raise HTTPException(status_code=400, detail="Inactive user") 
\ No newline at end of file
+    raise HTTPException(status_code=400, detail="Inactive user")
@@ -0,0 +1,37 @@
+from functools import partial
+from typing import Callable, Dict, TypeVar
+import os
+
+import anyio
+from anyio import to_thread
+from dotenv import load_dotenv
+
+from .database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+load_dotenv()
+
+T = TypeVar("T")
+
+# Blocking work is dispatched onto bounded thread pools so that it can never
+# starve the event loop. The DB pool defaults to the SQLAlchemy connection
+# pool's capacity (DB_POOL_SIZE + DB_MAX_OVERFLOW), so no thread sits waiting
+# for a connection.
+POOL_SIZES = {
+    "db": int(os.getenv("DB_THREADPOOL_SIZE", str(DB_POOL_SIZE + DB_MAX_OVERFLOW))),
+}
+
+_limiters: Dict[str, anyio.CapacityLimiter] = {}
+
+
+def _get_limiter(pool: str) -> anyio.CapacityLimiter:
+    # CapacityLimiter has to be created inside a running event loop
+    limiter = _limiters.get(pool)
+    if limiter is None:
+        limiter = anyio.CapacityLimiter(POOL_SIZES[pool])
+        _limiters[pool] = limiter
+    return limiter
+
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """Run a synchronous DB call (crud, ORM access) on the DB thread pool."""
+    return await to_thread.run_sync(partial(func, *args, **kwargs), limiter=_get_limiter("db"))
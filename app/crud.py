@@ -1,7 +1,365 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
-from . import models, schemas, auth
+from sqlalchemy import and_, func, insert, or_, update
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from typing import Optional
+from datetime import datetime, date, timedelta
+from decimal import Decimal
+from . import models, schemas, auth, jobs
+from .models import ZERO
+
+def compute_user_totals(db: Session, user_id: int) -> dict:
+    """Aggregate a user's totals from the raw deposit, withdrawal and entry tables."""
+    total_deposited = db.query(func.sum(models.Deposit.amount)).filter(
+        models.Deposit.user_id == user_id
+    ).scalar() or ZERO
+    
+    total_withdrawn = db.query(func.sum(models.Withdrawal.amount)).filter(
+        models.Withdrawal.user_id == user_id
+    ).scalar() or ZERO
+    
+    total_profit, total_loss = db.query(
+        func.sum(models.DailyEntry.profit), func.sum(models.DailyEntry.loss)
+    ).filter(
+        models.DailyEntry.user_id == user_id
+    ).one()
+    
+    return {
+        "total_deposited": total_deposited,
+        "total_withdrawn": total_withdrawn,
+        "total_profit": total_profit or ZERO,
+        "total_loss": total_loss or ZERO,
+    }
+
+def get_user_stats(db: Session, user_id: int):
+    """Return the user's stats row, seeding it from the raw tables if missing."""
+    stats = db.get(models.UserStats, user_id)
+    if stats is None:
+        stats = models.UserStats(user_id=user_id, version=0, **compute_user_totals(db, user_id))
+        db.add(stats)
+        # Pending objects are invisible to db.get(), so flush to avoid seeding twice
+        db.flush()
+    return stats
+
+def lock_user(db: Session, user_id: int):
+    """Hold the user's row lock until the caller's transaction ends.
+
+    Every write that changes a user's balance takes this lock once, at its
+    entry point, before reading anything it derives a change from, so
+    concurrent writes for one user run one after another. The helpers it
+    calls (_record_changes, the bulk writers) assume the lock is held.
+
+    A transaction the session already has open, e.g. from the authentication
+    lookup, is committed first. Under MySQL's REPEATABLE READ its snapshot
+    would otherwise predate the writer we waited for, and every read after
+    the lock would miss that writer's changes. SQLite has no SELECT ... FOR UPDATE; a no-op UPDATE
+    takes its database write lock instead, waiting up to busy_timeout. It
+    rewrites is_active rather than the key, which would make SQLite check
+    every table referencing users.
+    """
+    if db.in_transaction():
+        db.commit()
+    if db.get_bind().dialect.name == "sqlite":
+        users = models.User.__table__
+        db.execute(update(users).where(users.c.id == user_id).values(is_active=users.c.is_active))
+    else:
+        db.query(models.User.id).filter(models.User.id == user_id).with_for_update().one()
+
+def _money_add(column, delta: Decimal):
+    # SQLite stores NUMERIC as REAL; rounding keeps every stored value at whole cents
+    return func.round(column + delta, 2)
+
+def _adjust_totals(db: Session, user_id: int, deposited: Decimal = ZERO, withdrawn: Decimal = ZERO,
+                   profit: Decimal = ZERO, loss: Decimal = ZERO):
+    """Apply a change to the user's stats as atomic increments in the caller's transaction."""
+    stats = get_user_stats(db, user_id)
+    totals = models.UserStats.__table__.c
+    db.execute(update(models.UserStats.__table__).where(totals.user_id == user_id).values(
+        version=totals.version + 1,
+        total_deposited=_money_add(totals.total_deposited, deposited),
+        total_withdrawn=_money_add(totals.total_withdrawn, withdrawn),
+        total_profit=_money_add(totals.total_profit, profit),
+        total_loss=_money_add(totals.total_loss, loss),
+    ))
+    db.expire(stats)
+
+ROLLUP_PERIODS = ("week", "month", "year")
+ROLLUP_FIELDS = ("profit", "loss", "entry_count", "deposits", "withdrawals")
+
+def period_start(kind: str, day: date) -> date:
+    """First day of the week (Monday), month or year containing ``day``."""
+    if kind == "week":
+        return day - timedelta(days=day.weekday())
+    if kind == "month":
+        return day.replace(day=1)
+    return date(day.year, 1, 1)
+
+def _as_date(value) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+def _bucket_add(buckets: dict, day: date, values: tuple):
+    for kind in ROLLUP_PERIODS:
+        bucket = buckets.setdefault((kind, period_start(kind, day)), [ZERO, ZERO, 0, ZERO, ZERO])
+        for i, value in enumerate(values):
+            bucket[i] += value
+
+def compute_user_rollups(db: Session, user_id: int) -> dict:
+    """Aggregate (period_kind, period_start) -> [profit, loss, entry_count, deposits, withdrawals]
+    from the raw tables, one grouped query per table."""
+    buckets = {}
+    entry_days = db.query(
+        models.DailyEntry.date, func.sum(models.DailyEntry.profit),
+        func.sum(models.DailyEntry.loss), func.count(models.DailyEntry.id)
+    ).filter(models.DailyEntry.user_id == user_id).group_by(models.DailyEntry.date)
+    for day, profit, loss, count in entry_days:
+        _bucket_add(buckets, day, (profit or ZERO, loss or ZERO, count, ZERO, ZERO))
+    for model, position in ((models.Deposit, 3), (models.Withdrawal, 4)):
+        flow_days = db.query(model.date, func.sum(model.amount)).filter(
+            model.user_id == user_id
+        ).group_by(model.date)
+        for day, amount in flow_days:
+            values = [ZERO, ZERO, 0, ZERO, ZERO]
+            values[position] = amount or ZERO
+            _bucket_add(buckets, day, values)
+    return buckets
+
+def rebuild_user_rollups(db: Session, user_id: int):
+    """Replace the user's rollups with a fresh aggregation of the raw tables. The caller commits."""
+    stats = get_user_stats(db, user_id)
+    db.query(models.PeriodRollup).filter(models.PeriodRollup.user_id == user_id).delete(synchronize_session=False)
+    for (kind, start), values in compute_user_rollups(db, user_id).items():
+        db.add(models.PeriodRollup(
+            user_id=user_id, period_kind=kind, period_start=start, **dict(zip(ROLLUP_FIELDS, values))
+        ))
+    stats.rollups_ready = True
+    db.flush()
+
+def _ensure_rollups(db: Session, user_id: int, stats: models.UserStats):
+    """Build the user's rollups if they predate the period_rollups table."""
+    if not stats.rollups_ready:
+        rebuild_user_rollups(db, user_id)
+
+def _apply_rollup_deltas(db: Session, user_id: int, buckets: dict):
+    starts = {start for _, start in buckets}
+    existing = {
+        (row.period_kind, row.period_start): row
+        for row in db.query(models.PeriodRollup).filter(
+            models.PeriodRollup.user_id == user_id,
+            models.PeriodRollup.period_start.in_(starts)
+        )
+    }
+    for (kind, start), values in buckets.items():
+        row = existing.get((kind, start))
+        if row is None:
+            row = models.PeriodRollup(
+                user_id=user_id, period_kind=kind, period_start=start,
+                profit=ZERO, loss=ZERO, entry_count=0, deposits=ZERO, withdrawals=ZERO
+            )
+            db.add(row)
+        for field, delta in zip(ROLLUP_FIELDS, values):
+            setattr(row, field, getattr(row, field) + delta)
+    # Make new rows visible to the next batch in this transaction
+    db.flush()
+
+def _closing_balance_query(db: Session, user_id: int, before: Optional[date] = None):
+    """Closing balance of the user's latest month (before ``before``), one primary-key seek."""
+    months = models.LedgerMonth
+    query = db.query(months.balance).filter(months.user_id == user_id)
+    if before is not None:
+        query = query.filter(months.month_start < before)
+    return query.order_by(months.month_start.desc()).limit(1)
+
+def _balance_through(db: Session, user_id: int, day: date, inclusive: bool = True) -> Decimal:
+    """Balance after the entries dated up to ``day`` (or just before it): the
+    previous month's closing balance plus this month's entries so far."""
+    month = period_start("month", day)
+    ledger = models.LedgerEntry
+    so_far = db.query(func.sum(ledger.amount)).filter(
+        ledger.user_id == user_id,
+        ledger.effective_date >= month,
+        ledger.effective_date <= day if inclusive else ledger.effective_date < day,
+    )
+    opening, so_far = db.query(
+        _closing_balance_query(db, user_id, month).scalar_subquery(), so_far.scalar_subquery()
+    ).one()
+    return (opening or ZERO) + (so_far or ZERO)
+
+def get_balance(db: Session, user_id: int, on: Optional[date] = None) -> Decimal:
+    """Balance after every ledger entry dated on or before ``on`` (default: all of
+    them): a seek in ledger_months plus an index range scan of at most a month."""
+    if on is not None:
+        return _balance_through(db, user_id, on)
+    balance = _closing_balance_query(db, user_id).scalar()
+    return ZERO if balance is None else balance
+
+def get_equity_curve(db: Session, user_id: int, start: Optional[date] = None,
+                     end: Optional[date] = None) -> list:
+    """Closing balance of each day with ledger entries, from the opening balance
+    and one ordered index range scan."""
+    balance = ZERO
+    query = db.query(models.LedgerEntry.effective_date, models.LedgerEntry.amount).filter(
+        models.LedgerEntry.user_id == user_id
+    )
+    if start is not None:
+        balance = _balance_through(db, user_id, start, inclusive=False)
+        query = query.filter(models.LedgerEntry.effective_date >= start)
+    if end is not None:
+        query = query.filter(models.LedgerEntry.effective_date <= end)
+    closing = {}
+    for day, amount in query.order_by(models.LedgerEntry.effective_date, models.LedgerEntry.id):
+        balance += amount
+        closing[day] = balance
+    return [{"date": day, "balance": balance} for day, balance in closing.items()]
+
+def compute_user_ledger(db: Session, user_id: int) -> list[tuple]:
+    """(effective_date, entry_type, amount) for every raw row, in ledger order."""
+    entries = [
+        (day, "deposit", amount) for day, amount in
+        db.query(models.Deposit.date, models.Deposit.amount).filter(models.Deposit.user_id == user_id)
+    ]
+    entries += [
+        (day, "withdrawal", -amount) for day, amount in
+        db.query(models.Withdrawal.date, models.Withdrawal.amount).filter(models.Withdrawal.user_id == user_id)
+    ]
+    entry_days = db.query(models.DailyEntry.date, models.DailyEntry.profit, models.DailyEntry.loss).filter(
+        models.DailyEntry.user_id == user_id
+    )
+    entries += [(day, "daily_entry", profit - loss) for day, profit, loss in entry_days if profit != loss]
+    entries.sort(key=lambda e: e[0])
+    return entries
+
+def rebuild_user_ledger(db: Session, user_id: int):
+    """Replace the user's ledger and month balances with one entry per raw row. The caller commits."""
+    db.query(models.LedgerEntry).filter(models.LedgerEntry.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.LedgerMonth).filter(models.LedgerMonth.user_id == user_id).delete(synchronize_session=False)
+    now = datetime.utcnow()
+    balance = ZERO
+    rows = []
+    closing = {}
+    for day, entry_type, amount in compute_user_ledger(db, user_id):
+        balance += amount
+        closing[period_start("month", day)] = balance
+        rows.append({
+            "user_id": user_id, "entry_type": entry_type, "amount": amount,
+            "effective_date": day, "created_at": now,
+        })
+    if rows:
+        db.execute(insert(models.LedgerEntry.__table__), rows)
+        db.execute(insert(models.LedgerMonth.__table__), [
+            {"user_id": user_id, "month_start": month, "balance": balance} for month, balance in closing.items()
+        ])
+
+def _ledger_entries(changes: list[tuple]) -> list[tuple]:
+    """(effective_date, entry_type, amount) entries for a batch of _change deltas, in date order.
+
+    Each deposit and withdrawal gets an entry. Daily entry deltas for the same
+    day (an edit's reversal and its new values) are netted into one entry, and
+    entries that net to zero are dropped.
+    """
+    entries = []
+    pnl = {}
+    for day, deposited, withdrawn, profit, loss, _ in changes:
+        if deposited:
+            entries.append((day, "deposit", deposited))
+        if withdrawn:
+            entries.append((day, "withdrawal", -withdrawn))
+        pnl[day] = pnl.get(day, ZERO) + profit - loss
+    entries += [(day, "daily_entry", amount) for day, amount in pnl.items() if amount]
+    entries.sort(key=lambda e: e[0])
+    return entries
+
+def _append_ledger(db: Session, user_id: int, changes: list[tuple]):
+    """Append ledger entries for a batch of deltas and move the month balances they affect.
+
+    The ledger itself is only inserted into. Each month with new entries, and
+    every later month, moves by everything added up to it: one range UPDATE
+    per distinct month in the batch, touching at most one row per month.
+    Months without a row yet close at the previous month's new balance plus
+    their own entries.
+    """
+    entries = _ledger_entries(changes)
+    if not entries:
+        return
+    now = datetime.utcnow()
+    db.execute(insert(models.LedgerEntry.__table__), [
+        {"user_id": user_id, "entry_type": entry_type, "amount": amount, "effective_date": day, "created_at": now}
+        for day, entry_type, amount in entries
+    ])
+
+    added = {}
+    for day, _, amount in entries:
+        month = period_start("month", day)
+        added[month] = added.get(month, ZERO) + amount
+    months = sorted(added)
+    table = models.LedgerMonth.__table__
+    # Read before any update: the balance before the first month, and every month from it on
+    balance = _closing_balance_query(db, user_id, months[0]).scalar() or ZERO
+    existing = dict(db.query(table.c.month_start, table.c.balance).filter(
+        table.c.user_id == user_id, table.c.month_start >= months[0]
+    ).all())
+
+    total = ZERO
+    for month, next_month in zip(months, months[1:] + [None]):
+        total += added[month]
+        if not total:
+            continue
+        later = and_(table.c.user_id == user_id, table.c.month_start >= month)
+        if next_month is not None:
+            later = and_(later, table.c.month_start < next_month)
+        db.execute(update(table).where(later).values(balance=_money_add(table.c.balance, total)))
+
+    rows = []
+    total = ZERO
+    for month in sorted(existing.keys() | added.keys()):
+        total += added.get(month, ZERO)
+        if month in existing:
+            balance = existing[month] + total
+        else:
+            balance += added[month]
+            rows.append({"user_id": user_id, "month_start": month, "balance": balance})
+    if rows:
+        db.execute(insert(table), rows)
+
+def _change(day, deposited: Decimal = ZERO, withdrawn: Decimal = ZERO, profit: Decimal = ZERO,
+            loss: Decimal = ZERO, entries: int = 0) -> tuple:
+    return (_as_date(day), deposited, withdrawn, profit, loss, entries)
+
+def _record_changes(db: Session, user_id: int, changes: list[tuple]):
+    """Apply journal deltas (built with _change) to the ledger, user_stats and period_rollups.
+
+    Must run before the raw tables are modified, so that derived rows missing
+    for older users are seeded from the state the deltas apply to. The caller
+    must already hold lock_user, taken before reading the rows the deltas are
+    computed from.
+    """
+    stats = get_user_stats(db, user_id)
+    _ensure_rollups(db, user_id, stats)
+    _adjust_totals(
+        db, user_id,
+        deposited=sum((c[1] for c in changes), ZERO),
+        withdrawn=sum((c[2] for c in changes), ZERO),
+        profit=sum((c[3] for c in changes), ZERO),
+        loss=sum((c[4] for c in changes), ZERO),
+    )
+    _append_ledger(db, user_id, changes)
+    buckets = {}
+    for day, deposited, withdrawn, profit, loss, entries in changes:
+        _bucket_add(buckets, day, (profit, loss, entries, deposited, withdrawn))
+    _apply_rollup_deltas(db, user_id, buckets)
+
+def get_period_rollups(db: Session, user_id: int, kind: str, start: Optional[date] = None,
+                       end: Optional[date] = None):
+    query = db.query(models.PeriodRollup).filter(
+        models.PeriodRollup.user_id == user_id,
+        models.PeriodRollup.period_kind == kind
+    )
+    if start is not None:
+        query = query.filter(models.PeriodRollup.period_start >= period_start(kind, start))
+    if end is not None:
+        query = query.filter(models.PeriodRollup.period_start <= end)
+    return query.order_by(models.PeriodRollup.period_start).all()
+
+def get_user(db: Session, user_id: int):
+    return db.get(models.User, user_id)
 
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
@@ -9,117 +367,278 @@ def get_user_by_username(db: Session, username: str):
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    print(f"Creating user with email: {user.email}, username: {user.username}")
-    hashed_password = auth.get_password_hash(user.password)
-    print(f"Password hashed successfully")
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = auth.get_password_hash(user.password)
     
     db_user = models.User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password
     )
-    print("User object created, adding to database...")
+    db_user.stats = models.UserStats(
+        total_deposited=ZERO, total_withdrawn=ZERO, total_profit=ZERO, total_loss=ZERO,
+        rollups_ready=True, version=0
+    )
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    print(f"User created successfully with ID: {db_user.id}")
     return db_user
 
 def create_deposit(db: Session, deposit: schemas.DepositCreate, user_id: int):
+    # Update user's active balance, totals and rollups
+    lock_user(db, user_id)
+    _record_changes(db, user_id, [_change(deposit.date, deposited=deposit.amount)])
+    
     db_deposit = models.Deposit(**deposit.dict(), user_id=user_id)
     db.add(db_deposit)
     
-    # Update user's active balance
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    user.active_balance += deposit.amount
-    
     db.commit()
     db.refresh(db_deposit)
     return db_deposit
 
 def create_withdrawal(db: Session, withdrawal: schemas.WithdrawalCreate, user_id: int):
+    # Update user's active balance, totals and rollups
+    lock_user(db, user_id)
+    _record_changes(db, user_id, [_change(withdrawal.date, withdrawn=withdrawal.amount)])
+    
     db_withdrawal = models.Withdrawal(**withdrawal.dict(), user_id=user_id)
     db.add(db_withdrawal)
     
-    # Update user's active balance
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    user.active_balance -= withdrawal.amount
-    
     db.commit()
     db.refresh(db_withdrawal)
     return db_withdrawal
 
 def create_daily_entry(db: Session, entry: schemas.DailyEntryCreate, user_id: int):
-    db_entry = models.DailyEntry(**entry.dict(), user_id=user_id)
-    db.add(db_entry)
-    
-    # Update user's active balance
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    user.active_balance += entry.profit - entry.loss
-    
+    """Save the entry for its day, overwriting the day's existing entry if there is one."""
+    lock_user(db, user_id)
+    previous = get_daily_entry_by_date(db, user_id, entry.date.date())
+    had_reasons = previous is not None and bool(previous.reason_profit or previous.reason_loss)
+
+    bulk_upsert_daily_entries(db, [entry], user_id)
     db.commit()
-    db.refresh(db_entry)
+
+    db_entry = get_daily_entry_by_date(db, user_id, entry.date.date())
+    if had_reasons or entry.reason_profit or entry.reason_loss:
+        jobs.insights_precomputer.schedule(user_id, entry.date.year, entry.date.month)
     return db_entry
 
+def bulk_create_deposits(db: Session, deposits: list[schemas.DepositCreate], user_id: int) -> Decimal:
+    """Insert deposits in one multi-row statement. The caller holds lock_user and commits."""
+    _record_changes(db, user_id, [_change(d.date, deposited=d.amount) for d in deposits])
+    rows = [{"user_id": user_id, "amount": d.amount, "date": d.date.date()} for d in deposits]
+    db.execute(insert(models.Deposit), rows)
+    return sum(d.amount for d in deposits)
+
+def bulk_create_withdrawals(db: Session, withdrawals: list[schemas.WithdrawalCreate], user_id: int) -> Decimal:
+    """Insert withdrawals in one multi-row statement. The caller holds lock_user and commits."""
+    _record_changes(db, user_id, [_change(w.date, withdrawn=w.amount) for w in withdrawals])
+    rows = [{"user_id": user_id, "amount": w.amount, "date": w.date.date()} for w in withdrawals]
+    db.execute(insert(models.Withdrawal), rows)
+    return -sum(w.amount for w in withdrawals)
+
+def _upsert(db: Session, table, keys: list[str], columns: tuple):
+    """INSERT ... ON DUPLICATE KEY / ON CONFLICT statement keyed on the unique ``keys``,
+    overwriting ``columns`` of an existing row."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table)
+        return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in columns})
+    stmt = postgresql.insert(table) if dialect == "postgresql" else sqlite.insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={c: stmt.excluded[c] for c in columns}
+    )
+
+def _daily_entry_upsert(db: Session):
+    return _upsert(db, models.DailyEntry.__table__, ["user_id", "date"],
+                   ("profit", "loss", "reason_profit", "reason_loss", "updated_at"))
+
+def bulk_upsert_daily_entries(db: Session, entries: list[schemas.DailyEntryCreate], user_id: int) -> Decimal:
+    """Insert or overwrite daily entries in one multi-row upsert. The caller
+    holds lock_user and commits.
+
+    Returns the net balance change relative to the entries being replaced.
+    """
+    now = datetime.utcnow()
+    rows = {}
+    for entry in entries:
+        # The last row for a given day wins, as with repeated form posts
+        day = entry.date.date()
+        rows[day] = {
+            "user_id": user_id, "date": day, "profit": entry.profit, "loss": entry.loss,
+            "reason_profit": entry.reason_profit, "reason_loss": entry.reason_loss,
+            "created_at": now, "updated_at": now,
+        }
+    replaced = db.query(models.DailyEntry.date, models.DailyEntry.profit, models.DailyEntry.loss).filter(
+        models.DailyEntry.user_id == user_id,
+        models.DailyEntry.date.in_(list(rows))
+    ).all()
+    changes = [_change(r["date"], profit=r["profit"], loss=r["loss"], entries=1) for r in rows.values()]
+    changes += [_change(r.date, profit=-r.profit, loss=-r.loss, entries=-1) for r in replaced]
+    _record_changes(db, user_id, changes)
+    db.execute(_daily_entry_upsert(db), list(rows.values()))
+    return sum((c[3] - c[4] for c in changes), ZERO)
+
 def get_daily_entry(db: Session, entry_id: int, user_id: int):
     return db.query(models.DailyEntry).filter(
         models.DailyEntry.id == entry_id,
         models.DailyEntry.user_id == user_id
     ).first()
 
+class EntryDateTaken(ValueError):
+    """Raised when an entry would move onto a day that already has one."""
+
 def update_daily_entry(db: Session, entry_id: int, entry: schemas.DailyEntryCreate, user_id: int):
-    db_entry = get_daily_entry(db, entry_id, user_id)
+    lock_user(db, user_id)
+    # Reload under the lock: a copy read earlier in this session may be stale
+    db_entry = db.query(models.DailyEntry).populate_existing().filter(
+        models.DailyEntry.id == entry_id,
+        models.DailyEntry.user_id == user_id
+    ).first()
     if not db_entry:
         return None
+    # Days are unique per user; checked under the lock so no other write can take the day meanwhile
+    day = _as_date(entry.date)
+    if day != db_entry.date and get_daily_entry_by_date(db, user_id, day) is not None:
+        db.rollback()
+        raise EntryDateTaken(f"There is already an entry on {day.isoformat()}; edit that entry instead")
+    
+    # Revert previous profit/loss and apply the new values
+    _record_changes(db, user_id, [
+        _change(db_entry.date, profit=-db_entry.profit, loss=-db_entry.loss, entries=-1),
+        _change(entry.date, profit=entry.profit, loss=entry.loss, entries=1),
+    ])
     
-    # Revert previous profit/loss from active balance
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    user.active_balance -= db_entry.profit - db_entry.loss
+    previous = (db_entry.date, db_entry.reason_profit, db_entry.reason_loss)
     
-    # Update entry and add new profit/loss
+    # Update entry
     for key, value in entry.dict().items():
         setattr(db_entry, key, value)
-    user.active_balance += entry.profit - entry.loss
     
     db.commit()
     db.refresh(db_entry)
+    if previous != (db_entry.date, db_entry.reason_profit, db_entry.reason_loss):
+        # Both months are affected if the entry moved to another date
+        for day in {previous[0], db_entry.date}:
+            jobs.insights_precomputer.schedule(user_id, day.year, day.month)
     return db_entry
 
+def get_user_version(db: Session, user_id: int) -> Optional[int]:
+    """Return the user's journal version, or None if their stats row has not been created yet."""
+    return db.query(models.UserStats.version).filter(models.UserStats.user_id == user_id).scalar()
+
 def get_dashboard_stats(db: Session, user_id: int):
-    total_deposited = db.query(func.sum(models.Deposit.amount)).filter(
-        models.Deposit.user_id == user_id
-    ).scalar() or 0.0
+    """Read the dashboard totals with one query: a primary-key lookup plus a ledger_months seek."""
+    row = db.query(models.UserStats, _closing_balance_query(db, user_id).scalar_subquery()).select_from(
+        models.User
+    ).outerjoin(
+        models.UserStats, models.UserStats.user_id == models.User.id
+    ).filter(models.User.id == user_id).first()
     
-    total_withdrawn = db.query(func.sum(models.Withdrawal.amount)).filter(
-        models.Withdrawal.user_id == user_id
-    ).scalar() or 0.0
+    stats, active_balance = row
+    backfilled = stats is None
+    if backfilled:
+        # Users created before user_stats existed are backfilled on first view
+        stats = get_user_stats(db, user_id)
     
-    total_profit = db.query(func.sum(models.DailyEntry.profit)).filter(
-        models.DailyEntry.user_id == user_id
-    ).scalar() or 0.0
-    
-    total_loss = db.query(func.sum(models.DailyEntry.loss)).filter(
-        models.DailyEntry.user_id == user_id
-    ).scalar() or 0.0
-    
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    
-    return {
-        "active_balance": user.active_balance,
-        "total_deposited": total_deposited,
-        "total_withdrawn": total_withdrawn,
-        "total_profit": total_profit,
-        "total_loss": total_loss,
-        "total_pnl": total_profit - total_loss
+    result = {
+        "active_balance": ZERO if active_balance is None else active_balance,
+        "total_deposited": stats.total_deposited,
+        "total_withdrawn": stats.total_withdrawn,
+        "total_profit": stats.total_profit,
+        "total_loss": stats.total_loss,
+        "total_pnl": stats.total_profit - stats.total_loss
     }
+    if backfilled:
+        db.commit()
+    return result
+
+HISTORY_COLUMNS = {
+    "entries": (
+        models.DailyEntry.id, models.DailyEntry.date, models.DailyEntry.profit, models.DailyEntry.loss,
+        models.DailyEntry.reason_profit, models.DailyEntry.reason_loss,
+        models.DailyEntry.created_at, models.DailyEntry.updated_at,
+    ),
+    "deposits": (models.Deposit.id, models.Deposit.date, models.Deposit.amount, models.Deposit.created_at),
+    "withdrawals": (
+        models.Withdrawal.id, models.Withdrawal.date, models.Withdrawal.amount, models.Withdrawal.created_at
+    ),
+}
+
+def month_range(year: int, month: int):
+    """Return the half-open [start, end) date range covering a calendar month."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
 
 def get_monthly_entries(db: Session, user_id: int, year: int, month: int):
-    return db.query(models.DailyEntry).filter(
+    # Plain range predicates so the (user_id, date) index can serve the query;
+    # read-only callers get column rows rather than tracked ORM objects
+    start, end = month_range(year, month)
+    return db.query(*HISTORY_COLUMNS["entries"]).filter(
         models.DailyEntry.user_id == user_id,
-        func.extract('year', models.DailyEntry.date) == year,
-        func.extract('month', models.DailyEntry.date) == month
-    ).all()
+        models.DailyEntry.date >= start,
+        models.DailyEntry.date < end
+    ).order_by(models.DailyEntry.date).all()
+
+def get_history_page(db: Session, user_id: int, kind: str, start: Optional[date] = None,
+                     end: Optional[date] = None, after: Optional[tuple] = None, limit: int = 50,
+                     newest_first: bool = True) -> tuple[list[dict], Optional[tuple]]:
+    """One page of daily entries, deposits or withdrawals, ordered by (date, id).
+
+    ``after`` is the (date, id) of the last row of the previous page; the
+    page continues from there with an index seek instead of an OFFSET, so
+    every page costs the same however deep it is. Returns the rows and the
+    (date, id) to pass as ``after`` for the next page, or None on the last.
+    """
+    columns = HISTORY_COLUMNS[kind]
+    model = columns[0].class_
+    query = db.query(*columns).filter(model.user_id == user_id)
+    if start is not None:
+        query = query.filter(model.date >= start)
+    if end is not None:
+        query = query.filter(model.date <= end)
+    if after is not None:
+        day, row_id = after
+        # The plain range on date lets the (user_id, date) index seek; the
+        # rest only filters rows on the boundary day
+        if newest_first:
+            query = query.filter(model.date <= day, or_(model.date < day, model.id < row_id))
+        else:
+            query = query.filter(model.date >= day, or_(model.date > day, model.id > row_id))
+    order = (model.date.desc(), model.id.desc()) if newest_first else (model.date, model.id)
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    following = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        following = (rows[-1].date, rows[-1].id)
+    return [row._asdict() for row in rows], following
+
+def get_month_version(db: Session, user_id: int, year: int, month: int):
+    """Return (latest updated_at, entry count) for a month, which changes whenever its entries do."""
+    start, end = month_range(year, month)
+    return db.query(func.max(models.DailyEntry.updated_at), func.count(models.DailyEntry.id)).filter(
+        models.DailyEntry.user_id == user_id,
+        models.DailyEntry.date >= start,
+        models.DailyEntry.date < end
+    ).one()
+
+def get_calendar_month(db: Session, user_id: int, year: int, month: int) -> list:
+    """Return one slot per day of the month (index 0 is the 1st), None on days without an entry."""
+    start, end = month_range(year, month)
+    days = [None] * (end - start).days
+    for entry in get_monthly_entries(db, user_id, year, month):
+        days[entry.date.day - 1] = {
+            "id": entry.id,
+            # Decimal strings, like every other money amount in a JSON response
+            "profit": str(entry.profit),
+            "loss": str(entry.loss),
+            "reason_profit": entry.reason_profit,
+            "reason_loss": entry.reason_loss
+        }
+    return days
 
 def get_daily_entry_by_date(db, user_id: int, date):
     return db.query(models.DailyEntry).filter(
@@ -127,14 +646,36 @@ def get_daily_entry_by_date(db, user_id: int, date):
         models.DailyEntry.date == date
     ).first()
 
+def get_monthly_insight(db: Session, user_id: int, year: int, month: int):
+    return db.get(models.MonthlyInsight, (user_id, year, month))
+
+def save_monthly_insight(db: Session, user_id: int, year: int, month: int, reasons_hash: str,
+                         trading_tips: str, lessons_learned: str):
+    # Upserted: a background rebuild and an /api/insights view may store the same month at once
+    columns = ("reasons_hash", "trading_tips", "lessons_learned", "updated_at")
+    db.execute(_upsert(db, models.MonthlyInsight.__table__, ["user_id", "year", "month"], columns), {
+        "user_id": user_id, "year": year, "month": month, "reasons_hash": reasons_hash,
+        "trading_tips": trading_tips, "lessons_learned": lessons_learned, "updated_at": datetime.utcnow(),
+    })
+    db.commit()
+    return get_monthly_insight(db, user_id, year, month)
+
 def reset_user_data(db: Session, user_id: int):
     """Delete all trading data for the given user and reset balance."""
+    lock_user(db, user_id)
     db.query(models.Deposit).filter(models.Deposit.user_id == user_id).delete(synchronize_session=False)
     db.query(models.Withdrawal).filter(models.Withdrawal.user_id == user_id).delete(synchronize_session=False)
     db.query(models.DailyEntry).filter(models.DailyEntry.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.MonthlyInsight).filter(models.MonthlyInsight.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.PeriodRollup).filter(models.PeriodRollup.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.LedgerEntry).filter(models.LedgerEntry.user_id == user_id).delete(synchronize_session=False)
+    db.query(models.LedgerMonth).filter(models.LedgerMonth.user_id == user_id).delete(synchronize_session=False)
 
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if user:
-        user.active_balance = 0.0
+    stats = get_user_stats(db, user_id)
+    stats.total_deposited = stats.total_withdrawn = ZERO
+    stats.total_profit = stats.total_loss = ZERO
+    stats.rollups_ready = True
+    stats.version += 1
 
     db.commit()
+    auth.invalidate_user(user_id)
@@ -1,6 +1,7 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -12,14 +13,60 @@ DB_PASSWORD = os.getenv('MYSQL_PASSWORD', 'trading_password')
 DB_HOST = os.getenv('DB_HOST', 'db')
 DB_NAME = os.getenv('MYSQL_DATABASE', 'trading_journal')
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?charset=utf8mb4"
-
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-    connect_args={"connect_timeout": 10}
+# DATABASE_URL selects any SQLAlchemy backend, e.g. sqlite:///./journal.db
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    'DATABASE_URL',
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}?charset=utf8mb4"
 )
+
+# Per worker process. By default the WEB_CONCURRENCY workers share
+# DB_MAX_CONNECTIONS, which stays below MySQL's default max_connections (151),
+# with at most 10 pooled + 5 overflow connections each
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+DB_MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', '120'))
+_connections = max(2, min(15, DB_MAX_CONNECTIONS // WEB_CONCURRENCY))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', str(_connections * 2 // 3)))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', str(_connections - _connections * 2 // 3)))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # ms
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+
+def engine_options(url: str) -> dict:
+    """create_engine keyword arguments suited to the backend behind ``url``."""
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite":
+        options = {"pool_pre_ping": True, "pool_recycle": 3600}
+        if url.get_backend_name() == "mysql":
+            options["connect_args"] = {"connect_timeout": 10}
+        return dict(options, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                    pool_timeout=DB_POOL_TIMEOUT)
+    # Connections are handed between the DB threadpool's threads, one at a time
+    options = {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT / 1000}}
+    if url.database in (None, "", ":memory:"):
+        # An in-memory database only exists within its connection, so share one
+        options["poolclass"] = StaticPool
+        return options
+    return dict(options, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers proceed while a writer commits; NORMAL only syncs at checkpoints
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+def create_app_engine(url: str):
+    app_engine = create_engine(url, **engine_options(url))
+    if app_engine.dialect.name == "sqlite":
+        event.listen(app_engine, "connect", _set_sqlite_pragmas)
+    return app_engine
+
+engine = create_app_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -31,7 +78,38 @@ def get_db():
     finally:
         db.close()
 
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# Apply pending migrations at startup; meant for single-node and development
+# setups, since concurrent workers must not migrate at the same time
+AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', '0') == '1'
+
+def _alembic_config():
+    from alembic.config import Config
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    # Leave the application's logging configuration alone
+    config.attributes["configure_logging"] = False
+    return config
+
+def upgrade_schema():
+    from alembic import command
+    command.upgrade(_alembic_config(), "head")
+
+def check_schema():
+    """Fail fast if the database is not at the latest migration."""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    head = ScriptDirectory.from_config(_alembic_config()).get_current_head()
+    with engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    if current != head:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}; "
+            "run `alembic upgrade head` (or start with AUTO_MIGRATE=1)"
+        )
+
 def init_db():
-    from . import models
-    # Create tables if they do not exist
-    models.Base.metadata.create_all(bind=engine)
+    if AUTO_MIGRATE:
+        upgrade_schema()
+    check_schema()
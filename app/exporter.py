@@ -0,0 +1,175 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterator
+import csv
+import io
+import json
+import zlib
+
+from sqlalchemy import String, Text, cast, literal, null, select, union_all
+
+from . import models
+from .database import SessionLocal
+
+try:  # optional dependency for the Parquet format
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = {
+    "all": ["type", "id", "date", "amount", "profit", "loss", "reason_profit", "reason_loss", "created_at"],
+    "daily-entries": ["id", "date", "profit", "loss", "reason_profit", "reason_loss", "created_at", "updated_at"],
+    "deposits": ["id", "date", "amount", "created_at"],
+    "withdrawals": ["id", "date", "amount", "created_at"],
+}
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+MODELS = {
+    "daily-entries": models.DailyEntry,
+    "deposits": models.Deposit,
+    "withdrawals": models.Withdrawal,
+}
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _export_query(kind: str, user_id: int):
+    if kind != "all":
+        model = MODELS[kind]
+        columns = [getattr(model, name) for name in EXPORT_COLUMNS[kind]]
+        return select(*columns).where(model.user_id == user_id).order_by(model.date, model.id)
+
+    # One date-ordered stream over all three tables
+    def part(label, model, amount, profit, loss, reason_profit, reason_loss):
+        return select(
+            literal(label, String).label("type"), model.id.label("id"), model.date.label("date"),
+            amount.label("amount"), profit.label("profit"), loss.label("loss"),
+            reason_profit.label("reason_profit"), reason_loss.label("reason_loss"),
+            model.created_at.label("created_at"),
+        ).where(model.user_id == user_id)
+
+    no_money = cast(null(), models.Money)
+    no_text = cast(null(), Text)
+    entries = models.DailyEntry
+    journal = union_all(
+        part("deposit", models.Deposit, models.Deposit.amount, no_money, no_money, no_text, no_text),
+        part("withdrawal", models.Withdrawal, models.Withdrawal.amount, no_money, no_money, no_text, no_text),
+        part("daily_entry", entries, entries.profit - entries.loss, entries.profit, entries.loss,
+             entries.reason_profit, entries.reason_loss),
+    ).subquery()
+    return select(journal).order_by(journal.c.date, journal.c.type, journal.c.id)
+
+
+def _iter_batches(user_id: int, kind: str) -> Iterator[list]:
+    """Yield lists of result rows using a server-side cursor, one batch in memory at a time."""
+    db = SessionLocal()
+    try:
+        query = _export_query(kind, user_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        for batch in db.execute(query).partitions():
+            yield batch
+    finally:
+        db.close()
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _json_value(value):
+    # JSON has no decimal type; a string keeps the amount exact, as in the API responses
+    if isinstance(value, Decimal):
+        return str(value)
+    return _plain(value)
+
+
+def _csv_chunks(batches: Iterator[list], columns: list[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows([_plain(v) for v in row] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_chunks(batches: Iterator[list], columns: list[str]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [json.dumps({c: _json_value(v) for c, v in zip(columns, row)}) for row in batch]
+        yield ("\n".join(lines) + "\n").encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_schema(columns: list[str]):
+    types = {
+        "type": pa.string(), "id": pa.int64(), "date": pa.date32(),
+        "amount": pa.decimal128(14, 2), "profit": pa.decimal128(14, 2), "loss": pa.decimal128(14, 2),
+        "reason_profit": pa.string(), "reason_loss": pa.string(),
+        "created_at": pa.timestamp("us"), "updated_at": pa.timestamp("us"),
+    }
+    return pa.schema([(c, types[c]) for c in columns])
+
+
+def _parquet_chunks(batches: Iterator[list], columns: list[str]) -> Iterator[bytes]:
+    schema = _parquet_schema(columns)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        # Each batch becomes one row group, emitted as soon as it is written
+        for batch in batches:
+            arrays = list(zip(*batch))
+            writer.write_table(pa.table(
+                [pa.array(values, type=schema.field(c).type) for c, values in zip(columns, arrays)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(user_id: int, kind: str, fmt: str, compress: bool = False) -> Iterator[bytes]:
+    """Stream a user's journal in the requested format with constant memory."""
+    columns = EXPORT_COLUMNS[kind]
+    writer = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}[fmt]
+    chunks = writer(_iter_batches(user_id, kind), columns)
+    return _gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,98 @@
+from typing import BinaryIO, Iterator
+import csv
+import json
+import os
+
+from dotenv import load_dotenv
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from . import schemas, crud
+from .models import ZERO
+
+load_dotenv()
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+
+# kind -> (row schema, crud writer taking a batch of validated rows)
+IMPORT_KINDS = {
+    "daily-entries": (schemas.DailyEntryCreate, crud.bulk_upsert_daily_entries),
+    "deposits": (schemas.DepositCreate, crud.bulk_create_deposits),
+    "withdrawals": (schemas.WithdrawalCreate, crud.bulk_create_withdrawals),
+}
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class ImportRowError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+def _decoded_lines(fileobj: BinaryIO) -> Iterator[str]:
+    """Decode the upload one line at a time, so a bad byte is reported on its own line."""
+    for line_no, raw in enumerate(fileobj, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeDecodeError:
+            raise ImportRowError(line_no, "not valid UTF-8")
+
+
+def iter_records(fileobj: BinaryIO, fmt: str) -> Iterator[tuple[int, dict]]:
+    """Yield (line number, dict) per CSV row or NDJSON line without reading the whole file.
+
+    Line numbers count physical lines of the file, including the CSV header
+    and blank lines, so every error names the line to fix.
+    """
+    lines = _decoded_lines(fileobj)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            # The line the row ends on; quoted fields may span several
+            yield reader.line_num, record
+        return
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportRowError(line_no, f"invalid JSON ({e.msg})")
+
+
+def import_file(db: Session, user_id: int, kind: str, fileobj: BinaryIO, fmt: str) -> dict:
+    """Validate and write an uploaded file in batches inside a single transaction.
+
+    Any invalid row aborts the whole import, leaving the journal untouched.
+    """
+    schema, write_batch = IMPORT_KINDS[kind]
+    rows = 0
+    balance_change = ZERO
+    batch = []
+    try:
+        # One lock for the whole file; the batch writers assume it is held
+        crud.lock_user(db, user_id)
+        for line, record in iter_records(fileobj, fmt):
+            if not isinstance(record, dict):
+                raise ImportRowError(line, "expected an object")
+            # Blank CSV cells mean "use the default"
+            values = {k: v for k, v in record.items() if k is not None and v not in ("", None)}
+            try:
+                batch.append(schema(**values))
+            except ValidationError as e:
+                errors = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+                raise ImportRowError(line, errors)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                balance_change += write_batch(db, batch, user_id)
+                rows += len(batch)
+                batch = []
+        if batch:
+            balance_change += write_batch(db, batch, user_id)
+            rows += len(batch)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"kind": kind, "rows": rows, "balance_change": balance_change}
@@ -0,0 +1,184 @@
+from collections import Counter
+from typing import Dict, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+import httpx
+import markdown
+from dotenv import load_dotenv
+
+from . import metrics
+from .cache import TTLCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent",
+)
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "10"))
+GEMINI_MAX_CONNECTIONS = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+INSIGHTS_CACHE_TTL = float(os.getenv("INSIGHTS_CACHE_TTL", "3600"))
+INSIGHTS_CACHE_SIZE = int(os.getenv("INSIGHTS_CACHE_SIZE", "1024"))
+
+TIPS_PROMPT = "You are a trading coach. Based on these reasons traders succeeded, generate a concise list of best-practice Trading Tips. Format your response in Markdown."
+LESSONS_PROMPT = "You are a trading mentor. Based on these reasons traders lost money, generate a concise Lessons Learned list of common mistakes and how to avoid them. Format your response in Markdown."
+
+
+def fallback_summary(texts: list[str]) -> str:
+    """Summarise the most common reasons locally when Gemini is unavailable."""
+    counts = Counter(t.strip() for t in texts if t.strip())
+    if not counts:
+        return "No data available."
+    lines = [f"- {reason} ({count})" for reason, count in counts.most_common(5)]
+    return "\n".join(lines)
+
+
+def gemini_configured() -> bool:
+    return bool(os.getenv("GEMINI_API_KEY"))
+
+
+def reasons_hash(profit_reasons: list[str], loss_reasons: list[str]) -> str:
+    """Fingerprint a month's reasons so stored insights can be checked for staleness."""
+    digest = hashlib.sha256()
+    for label, texts in ((b"profit", profit_reasons), (b"loss", loss_reasons)):
+        digest.update(label)
+        for text in texts:
+            digest.update(b"\0")
+            digest.update(text.encode())
+    return digest.hexdigest()
+
+
+class InsightsEngine:
+    """Gemini client with a TTL/LRU result cache and request coalescing.
+
+    Identical (prompt, reasons) requests share one upstream call while it is in
+    flight and are answered from the cache afterwards. On timeouts and upstream
+    errors nothing is cached and callers fall back to the local summary.
+    """
+
+    def __init__(self, cache_size: int, cache_ttl: float):
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.coalesced = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(GEMINI_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=GEMINI_MAX_CONNECTIONS,
+                    max_keepalive_connections=GEMINI_MAX_CONNECTIONS,
+                ),
+            )
+        return self._client
+
+    @staticmethod
+    def cache_key(texts: list[str], prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode())
+        for text in texts:
+            digest.update(b"\0")
+            digest.update(text.encode())
+        return digest.hexdigest()
+
+    async def generate(self, texts: list[str], prompt: str) -> Optional[str]:
+        """Return Markdown insights for ``texts``, from cache when possible.
+
+        Returns None if Gemini is not configured or the request failed.
+        """
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            return None
+
+        key = self.cache_key(texts, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, texts, prompt, api_key))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded so one cancelled caller does not abort the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: str, texts: list[str], prompt: str, api_key: str) -> Optional[str]:
+        combined_text = "\n".join(texts)
+        data = {
+            "contents": [
+                {
+                    "parts": [
+                        {"text": f"{prompt}\n\n{combined_text}"}
+                    ]
+                }
+            ]
+        }
+        self.upstream_calls += 1
+        start = time.perf_counter()
+        try:
+            response = await self._get_client().post(
+                GEMINI_API_URL, params={"key": api_key}, json=data
+            )
+            response.raise_for_status()
+            result = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        except Exception as e:
+            outcome = "timeout" if isinstance(e, httpx.TimeoutException) else "error"
+            metrics.GEMINI_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+            self.upstream_errors += 1
+            error_msg = f"{type(e).__name__}: {e}".replace(api_key, "[REDACTED]")
+            logger.warning("Gemini request failed: %s", error_msg)
+            return None
+        metrics.GEMINI_SECONDS.labels("ok").observe(time.perf_counter() - start)
+        self.cache.set(key, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "upstream_calls": self.upstream_calls,
+            "upstream_errors": self.upstream_errors,
+            "coalesced": self.coalesced,
+            "cache_hit_ratio": self.cache.hit_ratio,
+            "cache_size": len(self.cache),
+        }
+
+    async def monthly_insights(self, profit_reasons: list[str], loss_reasons: list[str]) -> tuple[dict, bool]:
+        """Build the trading tips and lessons learned HTML, querying both prompts concurrently.
+
+        The flag is False when any part fell back to the local summary because
+        Gemini is not configured or failed, i.e. the result should not be
+        stored: it would outlive a key being configured later.
+        """
+
+        async def render(texts: list[str], prompt: str, empty_message: str) -> tuple[str, bool]:
+            if not texts:
+                return empty_message, True
+            result = await self.generate(texts, prompt)
+            if result is None:
+                return markdown.markdown(fallback_summary(texts)), False
+            return markdown.markdown(result), True
+
+        (trading_tips, tips_ok), (lessons_learned, lessons_ok) = await asyncio.gather(
+            render(profit_reasons, TIPS_PROMPT, "No profit reasons submitted yet."),
+            render(loss_reasons, LESSONS_PROMPT, "No loss reasons submitted yet."),
+        )
+        insights = {"trading_tips": trading_tips, "lessons_learned": lessons_learned}
+        return insights, tips_ok and lessons_ok
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+insights_engine = InsightsEngine(INSIGHTS_CACHE_SIZE, INSIGHTS_CACHE_TTL)
@@ -0,0 +1,176 @@
+from typing import Dict, Optional, Set, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from . import crud
+from .concurrency import run_db
+from .database import SessionLocal
+from .insights import gemini_configured, insights_engine, reasons_hash
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Quiet period after the last edit of a month before its insights are rebuilt
+INSIGHTS_DEBOUNCE_SECONDS = float(os.getenv("INSIGHTS_DEBOUNCE_SECONDS", "5"))
+INSIGHTS_JOB_CONCURRENCY = int(os.getenv("INSIGHTS_JOB_CONCURRENCY", "4"))
+INSIGHTS_RETRY_SECONDS = float(os.getenv("INSIGHTS_RETRY_SECONDS", "60"))
+INSIGHTS_MAX_ATTEMPTS = int(os.getenv("INSIGHTS_MAX_ATTEMPTS", "3"))
+
+JobKey = Tuple[int, int, int]  # (user_id, year, month)
+
+
+async def build_monthly_insights(db: Session, user_id: int, year: int, month: int,
+                                 use_stored: bool = True) -> Tuple[dict, bool]:
+    """Return a month's insights HTML, reusing the stored copy while its reasons are unchanged.
+
+    Fresh results are stored unless Gemini failed; the flag reports whether
+    the returned insights are complete (see InsightsEngine.monthly_insights).
+    """
+    entries = await run_db(crud.get_monthly_entries, db, user_id, year, month)
+    profit_reasons = [entry.reason_profit for entry in entries if entry.reason_profit]
+    loss_reasons = [entry.reason_loss for entry in entries if entry.reason_loss]
+    digest = reasons_hash(profit_reasons, loss_reasons)
+
+    if use_stored:
+        stored = await run_db(crud.get_monthly_insight, db, user_id, year, month)
+        if stored is not None and stored.reasons_hash == digest:
+            return {"trading_tips": stored.trading_tips, "lessons_learned": stored.lessons_learned}, True
+
+    insights, complete = await insights_engine.monthly_insights(profit_reasons, loss_reasons)
+    if complete:
+        await run_db(crud.save_monthly_insight, db, user_id, year, month, digest, **insights)
+    return insights, complete
+
+
+class InsightsPrecomputer:
+    """In-process queue that rebuilds a month's insights after its reasons change.
+
+    ``schedule`` may be called from any thread (crud runs on the DB thread
+    pool). Repeated edits of the same month within the debounce window are
+    folded into one job. Jobs are lost on restart, which is harmless: the
+    next /api/insights view rebuilds stale months on demand.
+    """
+
+    def __init__(self, debounce: float, concurrency: int):
+        self.debounce = debounce
+        self.concurrency = concurrency
+        self.scheduled = 0
+        self.debounced = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self.last_duration = 0.0
+        self._due: Dict[JobKey, float] = {}
+        self._attempts: Dict[JobKey, int] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # The loop only keeps weak references to tasks; hold running jobs until they finish
+        self._jobs: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop scheduling and cancel running jobs, waiting until they have all exited.
+
+        Callers close the insights engine next, so no job may still be using
+        its HTTP client when this returns. Cancelled jobs are not retried.
+        """
+        self._loop = None
+        tasks = list(self._jobs)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    def schedule(self, user_id: int, year: int, month: int) -> None:
+        """Queue a rebuild of one month; a no-op when the worker is not running.
+
+        Without Gemini there is nothing worth storing: the local summary is
+        built on each /api/insights view instead.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed() or not gemini_configured():
+            return
+        loop.call_soon_threadsafe(self._enqueue, (user_id, year, month), self.debounce)
+
+    def _enqueue(self, key: JobKey, delay: float) -> None:
+        if key in self._due:
+            self.debounced += 1
+        else:
+            self.scheduled += 1
+        self._due[key] = time.monotonic() + delay
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            ready = [key for key, due in self._due.items() if due <= now]
+            for key in ready:
+                del self._due[key]
+                await self._semaphore.acquire()
+                job = asyncio.create_task(self._process(key))
+                self._jobs.add(job)
+                job.add_done_callback(self._jobs.discard)
+
+            timeout = min(self._due.values()) - now if self._due else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _process(self, key: JobKey) -> None:
+        user_id, year, month = key
+        start = time.perf_counter()
+        self.running += 1
+        db = SessionLocal()
+        try:
+            _, complete = await build_monthly_insights(db, user_id, year, month, use_stored=False)
+        except Exception:
+            logger.exception("Insights job %s failed", key)
+            complete = False
+        finally:
+            await run_db(db.close)
+            self.running -= 1
+            self._semaphore.release()
+            self.last_duration = time.perf_counter() - start
+
+        if complete:
+            self.completed += 1
+            self._attempts.pop(key, None)
+            return
+        self.failed += 1
+        attempts = self._attempts.get(key, 0) + 1
+        if attempts < INSIGHTS_MAX_ATTEMPTS and key not in self._due:
+            self._attempts[key] = attempts
+            self._enqueue(key, INSIGHTS_RETRY_SECONDS)
+        else:
+            self._attempts.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._due),
+            "running": self.running,
+            "scheduled": self.scheduled,
+            "debounced": self.debounced,
+            "completed": self.completed,
+            "failed": self.failed,
+            "last_duration_seconds": self.last_duration,
+        }
+
+
+insights_precomputer = InsightsPrecomputer(INSIGHTS_DEBOUNCE_SECONDS, INSIGHTS_JOB_CONCURRENCY)
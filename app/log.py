@@ -0,0 +1,195 @@
+"""Structured logging that never writes from the request path.
+
+configure() routes every log record through a bounded in-memory queue to a
+background thread that formats it as one JSON object per line on stdout.
+The caller only renders the message and enqueues it; when the queue is full
+(stdout blocked), records are dropped and counted instead of stalling
+requests. RequestIdMiddleware tags each request with an id (the incoming
+X-Request-ID header, or a fresh one), echoes it in the response, attaches it
+to every record logged while serving the request - including from run_db
+threads - and writes one access line per request, sampled by
+ACCESS_LOG_SAMPLE_RATE. Errors and 5xx responses are always kept.
+"""
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of successful requests that get an access log line
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+
+access_logger = logging.getLogger("app.access")
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._-]{1,64}")
+# Attributes every LogRecord has; anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "request_id"}
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the request id; runs in the logging thread's caller."""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            data["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+        if record.stack_info:
+            data["stack_info"] = record.stack_info
+        return json.dumps(data, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Render args and tracebacks here, while they are still valid, and
+        # leave the JSON encoding to the listener thread. This is the root
+        # logger's only handler, so the record is updated in place.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure() -> None:
+    """Send all logging through the queue to stdout as JSON; safe to call more than once."""
+    global _handler, _listener
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter())
+    _handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    _handler.addFilter(RequestIdFilter())
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+    atexit.register(shutdown)
+
+    # Skip record fields the JSON output leaves out
+    logging.logThreads = False
+    logging.logMultiprocessing = False
+
+    root = logging.getLogger()
+    root.handlers = [_handler]
+    root.setLevel(LOG_LEVEL)
+    # uvicorn's own loggers go through the same pipeline, except its access
+    # log: RequestIdMiddleware writes those lines
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logger = logging.getLogger(name)
+        logger.handlers = []
+        logger.propagate = name != "uvicorn.access"
+
+
+def shutdown() -> None:
+    """Flush queued records and stop the listener thread.
+
+    The queue handler is detached from the root logger too, so records
+    logged afterwards reach logging's last-resort stderr handler instead of
+    a queue nobody reads. configure() sets everything up again.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        root = logging.getLogger()
+        if _handler in root.handlers:
+            root.removeHandler(_handler)
+
+
+def stats() -> dict:
+    if _handler is None:
+        return {}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
+
+
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _VALID_REQUEST_ID.fullmatch(request_id):
+            request_id = os.urandom(8).hex()
+        # Read now: routing rewrites scope["path"] for mounted apps such as /static
+        method, path = scope["method"], scope["path"]
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode())]
+            await send(message)
+
+        token = _request_id.set(request_id)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # Sample before building the record, so skipped lines cost nothing
+            level = logging.ERROR if status >= 500 else logging.INFO
+            sampled = level > logging.INFO or random.random() < ACCESS_LOG_SAMPLE_RATE
+            if sampled and access_logger.isEnabledFor(level):
+                access_logger.log(
+                    level, "%s %s %d", method, path, status,
+                    extra={"status": status, "duration_ms": round((time.perf_counter() - start) * 1000, 1)},
+                )
+            _request_id.reset(token)
@@ -1,91 +1,95 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile, File, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-import requests
+from datetime import datetime, timedelta, date, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import List, Optional
+from contextlib import asynccontextmanager
+import hashlib
+import logging
 import os
 from dotenv import load_dotenv
 from fastapi import Cookie
-import markdown  # Add this at the top with other imports
-from collections import Counter
 
-from . import models, schemas, crud, auth
+from . import schemas, crud, auth, importer, exporter, analytics, log, metrics, profiling
+from .assets import StaticAssets
 from .database import engine, get_db, init_db
+from .concurrency import run_db
+from .hashing import HasherBusy, password_hasher
+from .insights import insights_engine
+from .jobs import build_monthly_insights, insights_precomputer
 
 load_dotenv()
-
-# Initialize database
-init_db()
-
-app = FastAPI()
-templates = Jinja2Templates(directory="app/templates")
-
-# Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
-
-# Gemini AI integration
-def get_gemini_insights(texts: list[str], prompt: str) -> str:
-    """Fetch insights from Gemini or fall back to a local summary."""
-
-    def _fallback() -> str:
-        counts = Counter(t.strip() for t in texts if t.strip())
-        if not counts:
-            return "No data available."
-        lines = [f"- {reason} ({count})" for reason, count in counts.most_common(5)]
-        return "\n".join(lines)
-
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return _fallback()
-    
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-    
-    # Combine all texts with newlines
-    combined_text = "\n".join(texts)
-    
-    headers = {"Content-Type": "application/json"}
-    data = {
-        "contents": [
-            {
-                "parts": [
-                    {"text": f"{prompt}\n\n{combined_text}"}
-                ]
-            }
-        ]
-    }
-    
+log.configure()
+
+logger = logging.getLogger(__name__)
+
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+# Exports stream already-compressed formats and offer their own gzip=1 option
+GZIP_EXCLUDED_PREFIXES = ("/export",)
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(GZIP_EXCLUDED_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Restarts the log listener if an earlier lifespan in this process stopped it
+    log.configure()
+    init_db()
+    insights_precomputer.start()
     try:
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
-    except Exception as e:
-        error_msg = str(e)
-        if api_key:
-            error_msg = error_msg.replace(api_key, "[REDACTED]")
-        print(f"Gemini request failed: {error_msg}")
-        return _fallback()
+        yield
+    finally:
+        await insights_precomputer.stop()
+        password_hasher.shutdown()
+        await insights_engine.aclose()
+        metrics.mark_worker_stopped()
+        log.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+if profiling.PROFILING_ENABLED:
+    # Innermost, inside the metrics middleware whose SQL totals it reports
+    app.add_middleware(profiling.ProfilingMiddleware)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=6)
+# Outermost, so latency includes compression and the full streamed body
+app.add_middleware(metrics.MetricsMiddleware)
+# Outside the metrics middleware so its slow-query and N+1 warnings carry the request id
+app.add_middleware(log.RequestIdMiddleware)
+metrics.instrument_engine(engine)
+metrics.register_stats("password_hasher", password_hasher.stats)
+metrics.register_stats("insights_jobs", insights_precomputer.stats)
+metrics.register_stats("insights_engine", insights_engine.stats)
+metrics.register_stats("identity_cache", auth.identity_cache_stats)
+metrics.register_stats("logging", log.stats)
+templates = Jinja2Templates(directory="app/templates")
+if profiling.PROFILING_ENABLED:
+    profiling.instrument_templates(templates)
+
+# Mount static files; templates link to content-hashed URLs via static_url()
+static_assets = StaticAssets(directory="app/static")
+app.mount("/static", static_assets, name="static")
+templates.env.globals["static_url"] = static_assets.url
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint, for allow-listed addresses or the METRICS_TOKEN bearer token."""
+    client_host = request.client.host if request.client else None
+    if not metrics.scrape_allowed(client_host, request.headers.get("authorization")):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to read metrics")
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
 
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request, access_token: str = Cookie(None), db: Session = Depends(get_db)):
     # Try to get the current user from the access_token cookie
-    if access_token:
-        try:
-            # Remove 'Bearer ' prefix if present
-            token = access_token[7:] if access_token.startswith('Bearer ') else access_token
-            from jose import jwt
-            from .auth import SECRET_KEY, ALGORITHM
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            username = payload.get("sub")
-            if username:
-                from .crud import get_user_by_username
-                user = get_user_by_username(db, username=username)
-                if user:
-                    return RedirectResponse(url="/dashboard", status_code=303)
-        except Exception:
-            pass
+    if await auth.authenticate_token(access_token, db):
+        return RedirectResponse(url="/dashboard", status_code=303)
     # Not logged in, show landing page
     return templates.TemplateResponse("index.html", {"request": request})
 
@@ -95,22 +99,15 @@ async def register_page(request: Request):
 
 @app.post("/register")
 async def register(request: Request, db: Session = Depends(get_db)):
-    print("\n=== Registration Request ===")
     try:
         form = await request.form()
-        print(f"Form data: {dict(form)}")
-        
         email = form.get("email")
         username = form.get("username")
         password = form.get("password")
-        
-        print(f"Parsed fields:")
-        print(f"- Email: {email}")
-        print(f"- Username: {username}")
-        print(f"- Password length: {len(password) if password else 0}")
+        logger.debug("Registration attempt for username %s", username)
         
         if not email or not username or not password:
-            print("Error: Missing required fields")
+            logger.debug("Registration rejected: missing fields")
             return templates.TemplateResponse(
                 "register.html",
                 {
@@ -122,8 +119,8 @@ async def register(request: Request, db: Session = Depends(get_db)):
             )
         
         # Check if email exists
-        if crud.get_user_by_email(db, email=email):
-            print(f"Error: Email {email} already exists")
+        if await run_db(crud.get_user_by_email, db, email=email):
+            logger.debug("Registration rejected: email already registered")
             return templates.TemplateResponse(
                 "register.html",
                 {
@@ -135,8 +132,8 @@ async def register(request: Request, db: Session = Depends(get_db)):
             )
         
         # Check if username exists
-        if crud.get_user_by_username(db, username=username):
-            print(f"Error: Username {username} already exists")
+        if await run_db(crud.get_user_by_username, db, username=username):
+            logger.debug("Registration rejected: username %s taken", username)
             return templates.TemplateResponse(
                 "register.html",
                 {
@@ -147,19 +144,26 @@ async def register(request: Request, db: Session = Depends(get_db)):
                 }
             )
         
-        print("Creating new user...")
         # Create user
         user_in = schemas.UserCreate(email=email, username=username, password=password)
-        db_user = crud.create_user(db=db, user=user_in)
-        print(f"User created successfully with ID: {db_user.id}")
-        
-        print("Redirecting to login page...")
+        hashed_password = await auth.get_password_hash_async(password)
+        db_user = await run_db(crud.create_user, db=db, user=user_in, hashed_password=hashed_password)
+        logger.info("User %d registered", db_user.id, extra={"user_id": db_user.id})
         return RedirectResponse(url="/login?registered=1", status_code=303)
         
+    except HasherBusy:
+        return templates.TemplateResponse(
+            "register.html",
+            {
+                "request": request,
+                "error": "Server is busy, please try again in a moment.",
+                "email": email,
+                "username": username
+            },
+            status_code=503
+        )
     except Exception as e:
-        print(f"Error: {str(e)}")
-        import traceback
-        print(f"Traceback:\n{traceback.format_exc()}")
+        logger.exception("Registration failed")
         return templates.TemplateResponse(
             "register.html",
             {
@@ -183,19 +187,15 @@ async def login_page(request: Request):
 
 @app.post("/token")
 async def login(request: Request, db: Session = Depends(get_db)):
-    print("\n=== Login Request ===")
     try:
         form = await request.form()
-        print(f"Form data: {dict(form)}")
-        
         username = form.get("username")
         password = form.get("password")
+        logger.debug("Login attempt for username %s", username)
         
-        print(f"Login attempt for username: {username}")
-        
-        user = crud.get_user_by_username(db, username=username)
+        user = await run_db(crud.get_user_by_username, db, username=username)
         if not user:
-            print(f"User not found: {username}")
+            logger.info("Login failed: unknown username %s", username)
             return templates.TemplateResponse(
                 "login.html",
                 {
@@ -204,9 +204,8 @@ async def login(request: Request, db: Session = Depends(get_db)):
                 }
             )
         
-        print(f"User found, verifying password...")
-        if not auth.verify_password(password, user.hashed_password):
-            print("Password verification failed")
+        if not await auth.verify_password_async(password, user.hashed_password):
+            logger.info("Login failed: wrong password for user %d", user.id, extra={"user_id": user.id})
             return templates.TemplateResponse(
                 "login.html",
                 {
@@ -215,10 +214,10 @@ async def login(request: Request, db: Session = Depends(get_db)):
                 }
             )
         
-        print("Password verified successfully")
+        logger.debug("User %d logged in", user.id)
         access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = auth.create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data={"sub": str(user.id), "sub_type": "user_id"}, expires_delta=access_token_expires
         )
         
         # Create response with redirect
@@ -233,10 +232,17 @@ async def login(request: Request, db: Session = Depends(get_db)):
         )
         return response
 
+    except HasherBusy:
+        return templates.TemplateResponse(
+            "login.html",
+            {
+                "request": request,
+                "error": "Server is busy, please try again in a moment."
+            },
+            status_code=503
+        )
     except Exception as e:
-        print(f"Error: {str(e)}")
-        import traceback
-        print(f"Traceback:\n{traceback.format_exc()}")
+        logger.exception("Login failed")
         return templates.TemplateResponse(
             "login.html",
             {
@@ -252,31 +258,44 @@ async def logout():
     response.delete_cookie("access_token")
     return response
 
+def _etag(version: str) -> str:
+    return '"' + hashlib.sha1(version.encode()).hexdigest()[:20] + '"'
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since as RFC 9110 requires."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+    return False
+
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    # Get dashboard stats
-    stats = crud.get_dashboard_stats(db, current_user.id)
-    
-    # Get current month's entries
+    # The page only changes with the user's journal version, the month and the static assets
     now = datetime.utcnow()
-    monthly_entries = crud.get_monthly_entries(db, current_user.id, now.year, now.month)
+    version = await run_db(crud.get_user_version, db, current_user.id)
+    headers = {"Cache-Control": "private, no-cache"}
+    if version is not None:
+        headers["ETag"] = _etag(f"dashboard:{current_user.id}:{version}:{now.year}-{now.month}:{static_assets.version}")
+        if _not_modified(request, headers["ETag"], None):
+            return Response(status_code=304, headers=headers)
     
-    # Convert entries to dictionaries
-    entries_dict = []
-    for entry in monthly_entries:
-        entry_dict = {
-            "id": entry.id,
-            "date": entry.date.isoformat(),
-            "profit": float(entry.profit),
-            "loss": float(entry.loss),
-            "reason_profit": entry.reason_profit,
-            "reason_loss": entry.reason_loss
-        }
-        entries_dict.append(entry_dict)
+    # Get dashboard stats
+    stats = await run_db(crud.get_dashboard_stats, db, current_user.id)
+    
+    # Current month's calendar; other months are paged in from /api/calendar
+    calendar_days = await run_db(crud.get_calendar_month, db, current_user.id, now.year, now.month)
     
     # Insights are loaded asynchronously via AJAX
     trading_tips = ""
@@ -287,70 +306,181 @@ async def dashboard(
         {
             "request": request,
             "stats": stats,
-            "monthly_entries": entries_dict,
+            "calendar": {"year": now.year, "month": now.month, "days": calendar_days},
             "trading_tips": trading_tips,
             "lessons_learned": lessons_learned
-        }
+        },
+        headers=headers
     )
 
 
 @app.get("/api/insights")
 async def api_insights(
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db),
 ):
     """Return trading tips and lessons learned as HTML."""
     now = datetime.utcnow()
-    monthly_entries = crud.get_monthly_entries(db, current_user.id, now.year, now.month)
-
-    profit_reasons = [entry.reason_profit for entry in monthly_entries if entry.reason_profit]
-    loss_reasons = [entry.reason_loss for entry in monthly_entries if entry.reason_loss]
+    # Usually served from the copy precomputed after the last entry edit
+    insights, _ = await build_monthly_insights(db, current_user.id, now.year, now.month)
+    return insights
+
+@app.get("/api/analytics")
+async def api_analytics(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Return the equity curve, drawdown, win rate, streaks and returns for a date range."""
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return await run_db(analytics.get_analytics, db, current_user.id, date_from, date_to)
 
-    if profit_reasons:
-        tips_md = get_gemini_insights(
-            profit_reasons,
-            "You are a trading coach. Based on these reasons traders succeeded, generate a concise list of best-practice Trading Tips. Format your response in Markdown.",
-        )
-        trading_tips = markdown.markdown(tips_md)
-    else:
-        trading_tips = "No profit reasons submitted yet."
-
-    if loss_reasons:
-        lessons_md = get_gemini_insights(
-            loss_reasons,
-            "You are a trading mentor. Based on these reasons traders lost money, generate a concise Lessons Learned list of common mistakes and how to avoid them. Format your response in Markdown.",
+@app.get("/api/calendar")
+async def api_calendar(
+    request: Request,
+    year: int = Query(..., ge=1, le=9998),  # month_range needs the following January
+    month: int = Query(..., ge=1, le=12),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Return a month's entries indexed by day of month, with conditional GET support."""
+    last_modified, count = await run_db(crud.get_month_version, db, current_user.id, year, month)
+    etag = _etag(f"calendar:{current_user.id}:{year}-{month}:{count}:{last_modified.isoformat() if last_modified else ''}")
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    days = await run_db(crud.get_calendar_month, db, current_user.id, year, month)
+    return JSONResponse({"year": year, "month": month, "days": days}, headers=headers)
+
+@app.get("/api/rollups", response_model=List[schemas.PeriodRollup])
+async def api_rollups(
+    period: str = "month",
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Return weekly, monthly or yearly totals overlapping a date range."""
+    if period not in crud.ROLLUP_PERIODS:
+        raise HTTPException(
+            status_code=400, detail=f"period must be one of {', '.join(crud.ROLLUP_PERIODS)}"
         )
-        lessons_learned = markdown.markdown(lessons_md)
-    else:
-        lessons_learned = "No loss reasons submitted yet."
-
-    return {"trading_tips": trading_tips, "lessons_learned": lessons_learned}
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return await run_db(crud.get_period_rollups, db, current_user.id, period, date_from, date_to)
+
+@app.get("/api/balance", response_model=schemas.Balance)
+async def api_balance(
+    on: Optional[date] = Query(None, alias="date"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Return the balance after every entry dated on or before ``date`` (default: all of them)."""
+    balance = await run_db(crud.get_balance, db, current_user.id, on)
+    return {"as_of": on, "balance": balance}
+
+@app.get("/api/equity-curve", response_model=List[schemas.EquityPoint])
+async def api_equity_curve(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """Return the closing balance of each day with entries in a date range."""
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    return await run_db(crud.get_equity_curve, db, current_user.id, date_from, date_to)
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    """Cursors are "<date>:<id>" of the last row on the previous page."""
+    if cursor is None:
+        return None
+    try:
+        day, row_id = cursor.split(":")
+        return date.fromisoformat(day), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+async def _history_page(db: Session, user_id: int, kind: str, date_from: Optional[date],
+                        date_to: Optional[date], cursor: Optional[str], limit: int, order: str) -> dict:
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    items, following = await run_db(
+        crud.get_history_page, db, user_id, kind, date_from, date_to, _parse_cursor(cursor), limit,
+        order == "desc"
+    )
+    next_cursor = f"{following[0].isoformat()}:{following[1]}" if following else None
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/api/entries", response_model=schemas.Page[schemas.DailyEntryRecord])
+async def api_entries(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """List daily entries newest first (or oldest first with order=asc), a page at a time."""
+    return await _history_page(db, current_user.id, "entries", date_from, date_to, cursor, limit, order)
+
+@app.get("/api/deposits", response_model=schemas.Page[schemas.DepositRecord])
+async def api_deposits(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """List deposits newest first (or oldest first with order=asc), a page at a time."""
+    return await _history_page(db, current_user.id, "deposits", date_from, date_to, cursor, limit, order)
+
+@app.get("/api/withdrawals", response_model=schemas.Page[schemas.WithdrawalRecord])
+async def api_withdrawals(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db),
+):
+    """List withdrawals newest first (or oldest first with order=asc), a page at a time."""
+    return await _history_page(db, current_user.id, "withdrawals", date_from, date_to, cursor, limit, order)
 
 @app.get("/deposit", response_class=HTMLResponse)
 async def deposit_page(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user)
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user)
 ):
     return templates.TemplateResponse("deposit.html", {"request": request})
 
 @app.post("/deposit")
 async def create_deposit(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     try:
         form = await request.form()
-        amount = float(form.get("amount"))
+        amount = form.get("amount")
         date_str = form.get("date")
         date = datetime.strptime(date_str, "%Y-%m-%d").date()
         
         deposit = schemas.DepositCreate(amount=amount, date=date)
-        result = crud.create_deposit(db=db, deposit=deposit, user_id=current_user.id)
+        result = await run_db(crud.create_deposit, db=db, deposit=deposit, user_id=current_user.id)
         
         return RedirectResponse(url="/dashboard", status_code=303)
     except Exception as e:
-        print(f"Error creating deposit: {str(e)}")
+        logger.warning("Error creating deposit: %s", e)
         return templates.TemplateResponse(
             "deposit.html",
             {
@@ -362,28 +492,28 @@ async def create_deposit(
 @app.get("/withdraw", response_class=HTMLResponse)
 async def withdraw_page(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user)
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user)
 ):
     return templates.TemplateResponse("withdraw.html", {"request": request})
 
 @app.post("/withdraw")
 async def create_withdrawal(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     try:
         form = await request.form()
-        amount = float(form.get("amount"))
+        amount = form.get("amount")
         date_str = form.get("date")
         date = datetime.strptime(date_str, "%Y-%m-%d").date()
         
         withdrawal = schemas.WithdrawalCreate(amount=amount, date=date)
-        result = crud.create_withdrawal(db=db, withdrawal=withdrawal, user_id=current_user.id)
+        result = await run_db(crud.create_withdrawal, db=db, withdrawal=withdrawal, user_id=current_user.id)
         
         return RedirectResponse(url="/dashboard", status_code=303)
     except Exception as e:
-        print(f"Error creating withdrawal: {str(e)}")
+        logger.warning("Error creating withdrawal: %s", e)
         return templates.TemplateResponse(
             "withdraw.html",
             {
@@ -395,7 +525,7 @@ async def create_withdrawal(
 @app.get("/daily-entry", response_class=HTMLResponse)
 async def daily_entry_page(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     date_str = request.query_params.get("date")
@@ -403,7 +533,7 @@ async def daily_entry_page(
     if date_str:
         try:
             date = datetime.strptime(date_str, "%Y-%m-%d").date()
-            entry = crud.get_daily_entry_by_date(db, current_user.id, date)
+            entry = await run_db(crud.get_daily_entry_by_date, db, current_user.id, date)
             if entry:
                 entry_data = {
                     "date": entry.date.strftime("%Y-%m-%d"),
@@ -421,15 +551,16 @@ async def daily_entry_page(
 @app.post("/daily-entry")
 async def create_daily_entry(
     request: Request,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
     try:
         form = await request.form()
         date_str = form.get("date")
         date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        profit = float(form.get("profit", 0) or 0)
-        loss = float(form.get("loss", 0) or 0)
+        # Money fields are validated as exact decimals by the schema
+        profit = form.get("profit") or "0"
+        loss = form.get("loss") or "0"
         reason_profit = form.get("reason_profit")
         reason_loss = form.get("reason_loss")
         
@@ -441,18 +572,13 @@ async def create_daily_entry(
             reason_loss=reason_loss
         )
 
-        # If an entry for the given date already exists, update it instead of
-        # creating a new one. This prevents profit/loss values from being
-        # accumulated multiple times when the user edits a day.
-        existing = crud.get_daily_entry_by_date(db, current_user.id, date)
-        if existing:
-            result = crud.update_daily_entry(db=db, entry_id=existing.id, entry=entry, user_id=current_user.id)
-        else:
-            result = crud.create_daily_entry(db=db, entry=entry, user_id=current_user.id)
+        # Upserts on (user_id, date): posting a day that already has an entry
+        # overwrites it instead of adding a duplicate, even from two tabs at once
+        result = await run_db(crud.create_daily_entry, db=db, entry=entry, user_id=current_user.id)
         
         return RedirectResponse(url="/dashboard", status_code=303)
     except Exception as e:
-        print(f"Error creating daily entry: {str(e)}")
+        logger.warning("Error creating daily entry: %s", e)
         return templates.TemplateResponse(
             "daily_entry.html",
             {
@@ -461,39 +587,88 @@ async def create_daily_entry(
             }
         )
 
-@app.put("/daily-entry/{entry_id}")
+@app.put("/daily-entry/{entry_id}", response_model=schemas.DailyEntryRecord)
 async def update_daily_entry(
     entry_id: int,
     entry: schemas.DailyEntryCreate,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    updated_entry = crud.update_daily_entry(db=db, entry_id=entry_id, entry=entry, user_id=current_user.id)
+    try:
+        updated_entry = await run_db(crud.update_daily_entry, db=db, entry_id=entry_id, entry=entry, user_id=current_user.id)
+    except crud.EntryDateTaken as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not updated_entry:
         raise HTTPException(status_code=404, detail="Entry not found")
     return updated_entry
 
 
+@app.post("/api/import/{kind}", response_model=schemas.ImportResult)
+async def import_data(
+    kind: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Bulk import daily entries, deposits or withdrawals from CSV or NDJSON."""
+    if kind not in importer.IMPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown import kind: {kind}")
+    if format is None:
+        filename = (file.filename or "").lower()
+        format = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
+    if format not in importer.IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    try:
+        return await run_db(importer.import_file, db, current_user.id, kind, file.file, format)
+    except importer.ImportRowError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/export")
+async def export_data(
+    format: str = "csv",
+    kind: str = "all",
+    compress: bool = Query(False, alias="gzip"),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user)
+):
+    """Stream the user's journal as CSV, NDJSON or Parquet, optionally gzipped."""
+    if kind not in exporter.EXPORT_COLUMNS:
+        raise HTTPException(status_code=404, detail=f"Unknown export kind: {kind}")
+    if format not in exporter.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+    if format == "parquet" and not exporter.parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow to be installed")
+
+    media_type, extension = exporter.EXPORT_FORMATS[format]
+    filename = f"trading-journal-{kind}.{extension}"
+    if compress:
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        exporter.stream_export(current_user.id, kind, format, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @app.post("/reset-data")
 async def reset_data(
-    current_user: models.User = Depends(auth.get_current_active_user),
+    current_user: auth.UserSnapshot = Depends(auth.get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    crud.reset_user_data(db, current_user.id)
+    await run_db(crud.reset_user_data, db, current_user.id)
     return RedirectResponse(url="/dashboard", status_code=303)
 
 @app.get("/test")
 async def test():
-    print("Test endpoint called")
+    logger.debug("Test endpoint called")
     return {"message": "Test endpoint working"}
 
 @app.post("/test")
 async def test_post(request: Request):
-    print("\n=== Test POST Request ===")
     try:
         form = await request.form()
-        print(f"Form data: {dict(form)}")
         return {"message": "Test successful", "data": dict(form)}
     except Exception as e:
-        print(f"Error: {str(e)}")
+        logger.warning("Test POST failed: %s", e)
         return {"error": str(e)} 
@@ -0,0 +1,294 @@
+"""Operational commands for the trading journal database.
+
+Usage:
+    python -m app.maintenance reconcile-stats [--user-id ID] [--changed] [--fix]
+    python -m app.maintenance explain-queries --user-id ID
+    python -m app.maintenance verify-rollups [--user-id ID]
+    python -m app.maintenance rebuild-rollups [--user-id ID]
+"""
+from datetime import datetime
+import argparse
+import sys
+from typing import Iterator
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session
+
+from . import models, crud
+from .models import ZERO
+from .database import SessionLocal, engine
+
+STAT_FIELDS = ("total_deposited", "total_withdrawn", "total_profit", "total_loss")
+
+
+def reconcile_user_stats(db: Session, user_id: int, fix: bool = False) -> list[str]:
+    """Compare a user's stored totals with a fresh aggregation of the raw tables.
+
+    Money is stored as exact decimals, so any difference is a real mismatch.
+    Users without a user_stats row yet (it is seeded on their next write)
+    only have their ledger checked; ``fix`` seeds the row now. A clean (or
+    fixed) user is marked verified at their current version.
+    """
+    problems = []
+    expected = crud.compute_user_totals(db, user_id)
+    stats = db.get(models.UserStats, user_id)
+    if stats is not None:
+        for field in STAT_FIELDS:
+            stored = getattr(stats, field)
+            if stored != expected[field]:
+                problems.append(f"{field}: stored {stored} != actual {expected[field]}")
+
+    problems += _ledger_problems(db, user_id, expected)
+
+    if stats is None and fix:
+        stats = models.UserStats(user_id=user_id, version=0, **expected)
+        db.add(stats)
+    if problems and fix:
+        for field in STAT_FIELDS:
+            setattr(stats, field, expected[field])
+        stats.version += 1
+        crud.rebuild_user_ledger(db, user_id)
+    if stats is not None and (fix or not problems):
+        stats.verified_version = stats.version
+    db.commit()
+    return problems
+
+
+def _ledger_problems(db: Session, user_id: int, expected: dict) -> list[str]:
+    """Check the month closing balances and the ledger's per-type sums against the raw totals."""
+    problems = []
+    ledger = models.LedgerEntry
+    running = ZERO
+    closing = {}
+    sums = {"deposit": ZERO, "withdrawal": ZERO, "daily_entry": ZERO}
+    entries = db.query(ledger.effective_date, ledger.entry_type, ledger.amount).filter(
+        ledger.user_id == user_id
+    ).order_by(ledger.effective_date, ledger.id)
+    for day, entry_type, amount in entries:
+        running += amount
+        closing[crud.period_start("month", day)] = running
+        sums[entry_type] = sums.get(entry_type, ZERO) + amount
+
+    months = models.LedgerMonth
+    stored = dict(db.query(months.month_start, months.balance).filter(months.user_id == user_id).all())
+    for month in sorted(closing.keys() | stored.keys()):
+        if stored.get(month) != closing.get(month):
+            problems.append(f"ledger month {month}: closing balance {stored.get(month)} != {closing.get(month)}")
+            break
+
+    actual = {
+        "deposit": expected["total_deposited"],
+        "withdrawal": -expected["total_withdrawn"],
+        "daily_entry": expected["total_profit"] - expected["total_loss"],
+    }
+    for entry_type, total in actual.items():
+        stored_sum = sums.pop(entry_type)
+        if stored_sum != total:
+            problems.append(f"ledger {entry_type} entries: sum {stored_sum} != actual {total}")
+    problems += [f"ledger has {entry_type!r} entries" for entry_type in sums]
+    return problems
+
+
+def _unverified_user_ids(db: Session) -> set[int]:
+    """Users written to since their last clean check, plus any whose latest month
+    balance no longer matches their stored totals. Neither query touches the raw tables."""
+    stats = models.UserStats
+    changed = db.query(stats.user_id).filter(
+        or_(stats.verified_version.is_(None), stats.verified_version != stats.version)
+    )
+    months = models.LedgerMonth
+    balance = db.query(months.balance).filter(months.user_id == stats.user_id).order_by(
+        months.month_start.desc()
+    ).limit(1).correlate(stats).scalar_subquery()
+    inconsistent = db.query(stats.user_id).filter(
+        func.coalesce(balance, 0)
+        != stats.total_deposited - stats.total_withdrawn + stats.total_profit - stats.total_loss
+    )
+    return {row[0] for row in changed} | {row[0] for row in inconsistent}
+
+
+def reconcile_stats(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        query = db.query(models.User.id).order_by(models.User.id)
+        if args.user_id is not None:
+            query = query.filter(models.User.id == args.user_id)
+        user_ids = [user_id for (user_id,) in query.all()]
+        if args.changed:
+            pending = _unverified_user_ids(db)
+            user_ids = [user_id for user_id in user_ids if user_id in pending]
+        mismatched = unseeded = 0
+        for user_id in user_ids:
+            # Checked first, since --fix creates the row
+            if db.get(models.UserStats, user_id) is None:
+                unseeded += 1
+                print(f"user {user_id}: " + ("seeded user_stats" if args.fix else "not yet seeded"))
+            problems = reconcile_user_stats(db, user_id, fix=args.fix)
+            if problems:
+                mismatched += 1
+                action = "fixed" if args.fix else "mismatch"
+                print(f"user {user_id}: {action}: " + "; ".join(problems))
+        print(f"{len(user_ids)} user(s) checked, {mismatched} with mismatched totals, "
+              f"{unseeded} without user_stats")
+        return 1 if mismatched and not args.fix else 0
+    finally:
+        db.close()
+
+
+def _capture_statements(db: Session, read, *args) -> list[tuple]:
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    bind = db.get_bind()
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        read(db, *args)
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+    return captured
+
+
+def _is_full_scan(dialect: str, row) -> bool:
+    if dialect == "sqlite":
+        detail = row[-1]
+        # SCAN CONSTANT ROW is the FROM-less outer SELECT around scalar subqueries
+        return detail.startswith("SCAN ") and "INDEX" not in detail and detail != "SCAN CONSTANT ROW"
+    return row._mapping.get("type") == "ALL"
+
+
+def dashboard_query_plans(db: Session, user_id: int) -> Iterator[tuple[str, str, list]]:
+    """Yield (read path, statement, EXPLAIN rows) for each SELECT the dashboard read paths issue."""
+    now = datetime.utcnow()
+    checks = [
+        ("get_dashboard_stats", crud.get_dashboard_stats, (user_id,)),
+        ("compute_user_totals", crud.compute_user_totals, (user_id,)),
+        ("get_monthly_entries", crud.get_monthly_entries, (user_id, now.year, now.month)),
+        ("get_daily_entry_by_date", crud.get_daily_entry_by_date, (user_id, now.date())),
+        ("get_balance", crud.get_balance, (user_id, now.date())),
+        ("get_equity_curve", crud.get_equity_curve, (user_id, now.date().replace(month=1, day=1))),
+    ]
+    for kind in crud.HISTORY_COLUMNS:
+        checks.append((f"get_history_page[{kind}]", crud.get_history_page,
+                       (user_id, kind, None, None, (now.date(), 1 << 30))))
+    prefix = "EXPLAIN QUERY PLAN " if db.get_bind().dialect.name == "sqlite" else "EXPLAIN "
+    for name, read, read_args in checks:
+        for statement, parameters in _capture_statements(db, read, *read_args):
+            yield name, statement, db.connection().exec_driver_sql(prefix + statement, parameters).all()
+
+
+def explain_queries(args: argparse.Namespace) -> int:
+    """EXPLAIN the queries issued by the dashboard read paths and flag table scans."""
+    dialect = engine.dialect.name
+    scans = 0
+    db = SessionLocal()
+    try:
+        for name, statement, rows in dashboard_query_plans(db, args.user_id):
+            print(f"== {name}: {' '.join(statement.split())}")
+            for row in rows:
+                flag = ""
+                if _is_full_scan(dialect, row):
+                    scans += 1
+                    flag = "  <-- full scan"
+                print(f"   {tuple(row)}{flag}")
+    finally:
+        db.close()
+    print(f"{scans} full table scan(s)")
+    return 1 if scans else 0
+
+
+def verify_user_rollups(db: Session, user_id: int) -> list[str]:
+    """Compare a user's stored period rollups with a fresh aggregation of the raw tables."""
+    stats = db.get(models.UserStats, user_id)
+    if stats is None or not stats.rollups_ready:
+        return []  # built from the raw tables on the next write
+    expected = crud.compute_user_rollups(db, user_id)
+    stored = {
+        (row.period_kind, row.period_start): [getattr(row, f) for f in crud.ROLLUP_FIELDS]
+        for row in db.query(models.PeriodRollup).filter(models.PeriodRollup.user_id == user_id)
+    }
+    zero = [models.ZERO] * len(crud.ROLLUP_FIELDS)
+    problems = []
+    for key in sorted(set(expected) | set(stored)):
+        for field, have, want in zip(crud.ROLLUP_FIELDS, stored.get(key, zero), expected.get(key, zero)):
+            if have != want:
+                problems.append(f"{key[0]} {key[1]} {field}: stored {have} != actual {want}")
+    return problems
+
+
+def _user_ids(db: Session, user_id=None) -> list[int]:
+    query = db.query(models.User.id).order_by(models.User.id)
+    if user_id is not None:
+        query = query.filter(models.User.id == user_id)
+    return [row.id for row in query]
+
+
+def verify_rollups(args: argparse.Namespace) -> int:
+    db = SessionLocal()
+    try:
+        mismatched = 0
+        for user_id in _user_ids(db, args.user_id):
+            problems = verify_user_rollups(db, user_id)
+            if problems:
+                mismatched += 1
+                print(f"user {user_id}: mismatch: " + "; ".join(problems))
+        print(f"{mismatched} user(s) with mismatched rollups")
+        return 1 if mismatched else 0
+    finally:
+        db.close()
+
+
+def rebuild_rollups(args: argparse.Namespace) -> int:
+    """Recompute period rollups from the raw tables."""
+    db = SessionLocal()
+    try:
+        for user_id in _user_ids(db, args.user_id):
+            crud.rebuild_user_rollups(db, user_id)
+            db.commit()
+            print(f"user {user_id}: rebuilt")
+        return 0
+    finally:
+        db.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = commands.add_parser(
+        "reconcile-stats", help="verify user_stats and balances against the raw tables"
+    )
+    reconcile.add_argument("--user-id", type=int)
+    reconcile.add_argument("--fix", action="store_true", help="overwrite stored totals on mismatch")
+    reconcile.add_argument(
+        "--changed", action="store_true",
+        help="only check users written to since their last clean check"
+    )
+    reconcile.set_defaults(handler=reconcile_stats)
+
+    explain = commands.add_parser(
+        "explain-queries", help="show query plans for the dashboard read paths"
+    )
+    explain.add_argument("--user-id", type=int, required=True)
+    explain.set_defaults(handler=explain_queries)
+
+    verify = commands.add_parser(
+        "verify-rollups", help="verify period rollups against the raw tables"
+    )
+    verify.add_argument("--user-id", type=int)
+    verify.set_defaults(handler=verify_rollups)
+
+    rebuild = commands.add_parser(
+        "rebuild-rollups", help="recompute period rollups from the raw tables"
+    )
+    rebuild.add_argument("--user-id", type=int)
+    rebuild.set_defaults(handler=rebuild_rollups)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Prometheus metrics, served on /metrics.
+
+Records per-route request latency and in-flight requests (MetricsMiddleware),
+SQL statement counts and time per request with slow-query and N+1 warnings
+(instrument_engine), connection pool checkout waits, and Gemini call
+latency. The counters kept by the password hasher, insights jobs and caches
+are exported as gauges when scraped (register_stats).
+
+Scrapes are answered only for clients in METRICS_ALLOW_IPS (default: this
+host) or carrying ``Authorization: Bearer <METRICS_TOKEN>`` (scrape_allowed).
+
+With several workers, set PROMETHEUS_MULTIPROC_DIR to an empty directory so
+every worker's samples are aggregated; ``python -m app.serve`` does this
+itself. The register_stats gauges then come from the worker answering the
+scrape and carry its ``pid``.
+"""
+from collections import Counter as Tally
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+import hmac
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from starlette.routing import Match
+
+load_dotenv()
+
+SLOW_QUERY_SECONDS = float(os.getenv("SLOW_QUERY_MS", "200")) / 1000
+# One statement run this many times in a single request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_ALLOW_IPS = {ip.strip() for ip in os.getenv("METRICS_ALLOW_IPS", "127.0.0.1,::1").split(",") if ip.strip()}
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ["method", "route", "status"])
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency, until the last body chunk is sent", ["method", "route"]
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", ["method", "route"], multiprocess_mode="livesum"
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in SQL statements per request", ["route"])
+QUERY_SECONDS = Histogram("db_query_duration_seconds", "SQL statement latency", ["operation"])
+SLOW_QUERIES = Counter("db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS", ["route"])
+N_PLUS_ONE = Counter(
+    "db_n_plus_one_total", "Requests that ran one SQL statement N_PLUS_ONE_THRESHOLD times or more", ["route"]
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+POOL_IN_USE = Gauge("db_pool_connections_in_use", "DB connections checked out", multiprocess_mode="livesum")
+GEMINI_SECONDS = Histogram(
+    "gemini_request_duration_seconds", "Gemini API call latency", ["outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30),
+)
+
+SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+BACKGROUND = "background"  # route label for statements outside any request
+
+
+@dataclass
+class RequestQueries:
+    route: str
+    count: int = 0
+    seconds: float = 0.0
+    statements: Tally = field(default_factory=Tally)
+
+
+# Set per request by MetricsMiddleware; run_db's worker threads inherit it
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def current_queries() -> Optional[RequestQueries]:
+    """SQL totals of the request being served so far, if any."""
+    return _current.get()
+
+
+def route_label(scope) -> str:
+    """The matched route's path template, so /daily-entry/7 and /daily-entry/8 share a label."""
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_label(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        queries = RequestQueries(route)
+        token = _current.set(queries)
+        in_progress = IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            _current.reset(token)
+            REQUESTS.labels(method, route, str(status)).inc()
+            REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUEST_QUERIES.labels(route).observe(queries.count)
+            REQUEST_DB_SECONDS.labels(route).observe(queries.seconds)
+            _report_repeats(method, queries)
+
+
+def _report_repeats(method: str, queries: RequestQueries):
+    repeated = [(n, sql) for sql, n in queries.statements.items() if n >= N_PLUS_ONE_THRESHOLD]
+    if not repeated:
+        return
+    N_PLUS_ONE.labels(queries.route).inc()
+    for n, sql in repeated:
+        logger.warning("possible N+1 in %s %s: %d x %s", method, queries.route, n, " ".join(sql.split()))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    operation = statement.lstrip()[:6].upper()
+    QUERY_SECONDS.labels(operation if operation in SQL_OPERATIONS else "OTHER").observe(elapsed)
+
+    queries = _current.get()
+    if queries is not None:
+        queries.count += 1
+        queries.seconds += elapsed
+        queries.statements[statement] += 1
+    if elapsed >= SLOW_QUERY_SECONDS:
+        route = queries.route if queries is not None else BACKGROUND
+        SLOW_QUERIES.labels(route).inc()
+        logger.warning("slow query (%.0f ms) in %s: %s", elapsed * 1000, route, " ".join(statement.split()))
+
+
+def instrument_engine(engine) -> None:
+    """Time every SQL statement and pool checkout on ``engine``."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "checkout", lambda *args: POOL_IN_USE.inc())
+    event.listen(engine, "checkin", lambda *args: POOL_IN_USE.dec())
+
+    # The pool has no "before checkout" event, so time Engine.connect, which
+    # every Session and engine.begin() go through. Unlike engine.pool, the
+    # engine survives engine.dispose(), and the pool listeners above are
+    # carried over to the pool it creates.
+    connect = engine.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - start)
+
+    engine.connect = timed_connect
+
+
+_stats_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register_stats(name: str, source: Callable[[], dict]) -> None:
+    """Export the numbers in ``source()`` as app_<name>_<key> gauges on each scrape."""
+    _stats_sources[name] = source
+
+
+class StatsCollector:
+    def collect(self):
+        labels = {"pid": str(os.getpid())} if MULTIPROC_DIR else {}
+        for name, source in _stats_sources.items():
+            for key, value in source().items():
+                if isinstance(value, (int, float)):
+                    gauge = GaugeMetricFamily(f"app_{name}_{key}", f"{name} {key}", labels=list(labels))
+                    gauge.add_metric(list(labels.values()), value)
+                    yield gauge
+
+
+_stats_collector = StatsCollector()
+if not MULTIPROC_DIR:
+    REGISTRY.register(_stats_collector)
+
+
+def scrape_allowed(client_host: Optional[str], authorization: Optional[str]) -> bool:
+    """Whether a /metrics request comes from an allowed address or carries the bearer token."""
+    if client_host in METRICS_ALLOW_IPS:
+        return True
+    scheme, _, token = (authorization or "").partition(" ")
+    return bool(METRICS_TOKEN) and scheme.lower() == "bearer" and hmac.compare_digest(
+        token.strip().encode(), METRICS_TOKEN.encode()
+    )
+
+
+def render() -> bytes:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_stats_collector)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_worker_stopped() -> None:
+    """Drop this worker's live gauges (in-flight requests, pool use) from the aggregate."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Boolean, Date
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, ForeignKey, Text, Boolean, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from decimal import Decimal
 
-Base = declarative_base()
+from .database import Base
+
+# Exact money amounts; values come back from the database as Decimal
+Money = Numeric(14, 2)
+ZERO = Decimal("0.00")
 
 class User(Base):
     __tablename__ = "users"
@@ -13,19 +17,88 @@ class User(Base):
     username = Column(String(255), unique=True, index=True)
     hashed_password = Column(String(255))
     is_active = Column(Boolean, default=True)
-    active_balance = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     deposits = relationship("Deposit", back_populates="user")
     withdrawals = relationship("Withdrawal", back_populates="user")
     daily_entries = relationship("DailyEntry", back_populates="user")
+    stats = relationship("UserStats", back_populates="user", uselist=False)
+
+class UserStats(Base):
+    """Running totals per user, maintained by the crud write paths."""
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_deposited = Column(Money, default=ZERO, nullable=False)
+    total_withdrawn = Column(Money, default=ZERO, nullable=False)
+    total_profit = Column(Money, default=ZERO, nullable=False)
+    total_loss = Column(Money, default=ZERO, nullable=False)
+    # False until period_rollups have been built for this user
+    rollups_ready = Column(Boolean, default=False, nullable=False)
+    # Bumped on every journal write; part of the dashboard's ETag
+    version = Column(Integer, default=0, nullable=False)
+    # Version at the last clean reconcile-stats run; NULL if never checked
+    verified_version = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="stats")
+
+class PeriodRollup(Base):
+    """Per-user totals for one week, month or year, maintained incrementally by crud."""
+    __tablename__ = "period_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    period_kind = Column(String(8), primary_key=True)  # "week", "month" or "year"
+    period_start = Column(Date, primary_key=True)
+    profit = Column(Money, default=ZERO, nullable=False)
+    loss = Column(Money, default=ZERO, nullable=False)
+    entry_count = Column(Integer, default=0, nullable=False)
+    deposits = Column(Money, default=ZERO, nullable=False)
+    withdrawals = Column(Money, default=ZERO, nullable=False)
+
+class LedgerEntry(Base):
+    """Append-only journal of balance changes, written by every crud write path.
+
+    Rows are never updated: corrections are new entries, and a user's rows
+    are only deleted by a data reset or a rebuild from the raw tables.
+    Running balances live in LedgerMonth.
+    """
+    __tablename__ = "ledger_entries"
+    __table_args__ = (
+        # Covers the within-month balance sums and equity curve range scans
+        Index("ix_ledger_entries_user_date", "user_id", "effective_date", "id", "amount"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    entry_type = Column(String(16), nullable=False)  # "deposit", "withdrawal" or "daily_entry"
+    amount = Column(Money, nullable=False)  # signed change to the balance
+    effective_date = Column(Date, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class LedgerMonth(Base):
+    """Closing balance of each month that has ledger entries.
+
+    Unlike the ledger this is mutable: a back-dated entry adds its amount to
+    its own month and every later month, so a write rewrites at most one row
+    per month instead of every later ledger entry. The balance on a day is
+    the previous month's closing balance plus that month's entries so far.
+    """
+    __tablename__ = "ledger_months"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month_start = Column(Date, primary_key=True)
+    balance = Column(Money, nullable=False)
 
 class Deposit(Base):
     __tablename__ = "deposits"
+    __table_args__ = (
+        Index("ix_deposits_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    amount = Column(Float)
+    amount = Column(Money)
     date = Column(Date)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -33,10 +106,13 @@ class Deposit(Base):
 
 class Withdrawal(Base):
     __tablename__ = "withdrawals"
+    __table_args__ = (
+        Index("ix_withdrawals_user_date", "user_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    amount = Column(Float)
+    amount = Column(Money)
     date = Column(Date)
     created_at = Column(DateTime, default=datetime.utcnow)
 
@@ -44,15 +120,31 @@ class Withdrawal(Base):
 
 class DailyEntry(Base):
     __tablename__ = "daily_entries"
+    __table_args__ = (
+        # One entry per user and day; also serves all per-user date range scans
+        Index("ix_daily_entries_user_date", "user_id", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     date = Column(Date)
-    profit = Column(Float, default=0.0)
-    loss = Column(Float, default=0.0)
+    profit = Column(Money, default=ZERO)
+    loss = Column(Money, default=ZERO)
     reason_profit = Column(Text, nullable=True)
     reason_loss = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-    user = relationship("User", back_populates="daily_entries") 
\ No newline at end of file
+    user = relationship("User", back_populates="daily_entries")
+
+class MonthlyInsight(Base):
+    """Rendered AI insights for one user and month, refreshed in the background."""
+    __tablename__ = "monthly_insights"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    reasons_hash = Column(String(64), nullable=False)
+    trading_tips = Column(Text)
+    lessons_learned = Column(Text)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,179 @@
+"""Opt-in profiling of single requests.
+
+Off unless PROFILING_ENABLED=1 and PROFILING_TOKEN is set; only then is
+ProfilingMiddleware added to the app and are templates timed, so normal
+requests pay nothing. A request is profiled when it carries the token in an
+X-Profile-Token header or a ``profile`` query parameter:
+
+  * with the header, the normal response comes back with a Server-Timing
+    header splitting the request into SQL, template and auth time, and a
+    pyinstrument call-tree report is stored in PROFILING_DIR (file name in
+    the X-Profile-Report header);
+  * with the query parameter, handy from a browser, the report is returned
+    instead of the page.
+
+Reports need ``pip install pyinstrument``; without it only the breakdown is
+produced. The breakdown is also logged.
+"""
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Dict, Optional
+from urllib.parse import parse_qs
+import hmac
+import logging
+import os
+import tempfile
+import time
+
+from anyio import to_thread
+from dotenv import load_dotenv
+
+from . import log, metrics
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+load_dotenv()
+
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1" and bool(PROFILING_TOKEN)
+PROFILING_DIR = os.getenv("PROFILING_DIR", os.path.join(tempfile.gettempdir(), "journal-profiles"))
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.001"))  # seconds between samples
+
+logger = logging.getLogger(__name__)
+
+HEADER, QUERY = "header", "query"
+
+# Seconds per part (template, auth) of the request being profiled
+_breakdown: ContextVar[Optional[Dict[str, float]]] = ContextVar("profile_breakdown", default=None)
+_NOT_PROFILED = nullcontext()
+
+
+@contextmanager
+def _timing(breakdown: Dict[str, float], name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        breakdown[name] = breakdown.get(name, 0.0) + time.perf_counter() - start
+
+
+def timed(name: str):
+    """Count the time spent in the block towards ``name`` if the request is being profiled."""
+    breakdown = _breakdown.get()
+    if breakdown is None:
+        return _NOT_PROFILED
+    return _timing(breakdown, name)
+
+
+def instrument_templates(templates) -> None:
+    """Time template rendering, which TemplateResponse does up front."""
+    render = templates.TemplateResponse
+
+    def timed_render(*args, **kwargs):
+        with timed("template"):
+            return render(*args, **kwargs)
+
+    templates.TemplateResponse = timed_render
+
+
+def _token_matches(value: str) -> bool:
+    return hmac.compare_digest(value.encode(), PROFILING_TOKEN.encode())
+
+
+def requested_mode(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"x-profile-token":
+            return HEADER if _token_matches(value.decode("latin-1")) else None
+    if b"profile=" in scope["query_string"]:
+        values = parse_qs(scope["query_string"].decode("latin-1")).get("profile")
+        if values and _token_matches(values[0]):
+            return QUERY
+    return None
+
+
+def _milliseconds(breakdown: Dict[str, float], total: float) -> Dict[str, float]:
+    timings = {"total": total}
+    queries = metrics.current_queries()
+    if queries is not None:
+        timings["sql"] = queries.seconds
+    timings.update(breakdown)
+    return {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+
+
+def _server_timing(timings: Dict[str, float]) -> bytes:
+    queries = metrics.current_queries()
+    parts = []
+    for name, ms in timings.items():
+        part = f"{name};dur={ms}"
+        if name == "sql" and queries is not None:
+            part += f';desc="{queries.count} queries"'
+        parts.append(part)
+    return ", ".join(parts).encode()
+
+
+def _store(name: str, html: str) -> None:
+    os.makedirs(PROFILING_DIR, exist_ok=True)
+    with open(os.path.join(PROFILING_DIR, name), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        mode = requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        breakdown: Dict[str, float] = {}
+        report = f"{time.strftime('%Y%m%dT%H%M%S')}-{log.current_request_id() or os.urandom(8).hex()}.html"
+        profiler = Profiler(interval=PROFILING_INTERVAL, async_mode="enabled") if Profiler else None
+        replace_response = mode == QUERY and profiler is not None
+        timings = {}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timings.update(_milliseconds(breakdown, time.perf_counter() - start))
+                if replace_response:
+                    return
+                headers = list(message.get("headers", [])) + [(b"server-timing", _server_timing(timings))]
+                if profiler is not None:
+                    headers.append((b"x-profile-report", report.encode()))
+                message["headers"] = headers
+            elif replace_response:
+                return
+            await send(message)
+
+        # Read now: routing rewrites scope["path"] for mounted apps such as /static
+        method, path = scope["method"], scope["path"]
+        token = _breakdown.set(breakdown)
+        if profiler is not None:
+            profiler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+            _breakdown.reset(token)
+            logger.info("profiled %s %s", method, path,
+                        extra={"timings_ms": timings, "report": report if profiler is not None else None})
+
+        if profiler is None:
+            return
+        html = await to_thread.run_sync(profiler.output_html)
+        if not replace_response:
+            await to_thread.run_sync(_store, report, html)
+            return
+        body = html.encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/html; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"server-timing", _server_timing(timings)),
+        ]})
+        await send({"type": "http.response.body", "body": body})
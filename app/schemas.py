@@ -1,8 +1,15 @@
 from pydantic import BaseModel, EmailStr, Field
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, date
+from decimal import Decimal
+from typing import Annotated, Generic, List, Optional, TypeVar
 import re
 
+# Money is validated as an exact amount with at most two decimal places, and
+# serialized to JSON as a string ("12.50") so clients never see a float
+Money = Annotated[Decimal, Field(max_digits=14, decimal_places=2)]
+
+Item = TypeVar("Item")
+
 class UserBase(BaseModel):
     email: str = Field(..., pattern=r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
     username: str
@@ -12,7 +19,6 @@ class UserCreate(UserBase):
 
 class User(UserBase):
     id: int
-    active_balance: float
     created_at: datetime
 
     class Config:
@@ -26,7 +32,7 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 class DepositBase(BaseModel):
-    amount: float
+    amount: Money
     date: datetime
 
 class DepositCreate(DepositBase):
@@ -41,7 +47,7 @@ class Deposit(DepositBase):
         from_attributes = True
 
 class WithdrawalBase(BaseModel):
-    amount: float
+    amount: Money
     date: datetime
 
 class WithdrawalCreate(WithdrawalBase):
@@ -57,8 +63,8 @@ class Withdrawal(WithdrawalBase):
 
 class DailyEntryBase(BaseModel):
     date: datetime
-    profit: float = 0.0
-    loss: float = 0.0
+    profit: Money = Decimal("0")
+    loss: Money = Decimal("0")
     reason_profit: Optional[str] = None
     reason_loss: Optional[str] = None
 
@@ -75,9 +81,58 @@ class DailyEntry(DailyEntryBase):
         from_attributes = True
 
 class DashboardStats(BaseModel):
-    active_balance: float
-    total_deposited: float
-    total_withdrawn: float
-    total_profit: float
-    total_loss: float
-    total_pnl: float 
\ No newline at end of file
+    active_balance: Money
+    total_deposited: Money
+    total_withdrawn: Money
+    total_profit: Money
+    total_loss: Money
+    total_pnl: Money
+
+class Balance(BaseModel):
+    as_of: Optional[date] = None
+    balance: Money
+
+class EquityPoint(BaseModel):
+    date: date
+    balance: Money
+
+class DailyEntryRecord(BaseModel):
+    id: int
+    date: date
+    profit: Money
+    loss: Money
+    reason_profit: Optional[str] = None
+    reason_loss: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class DepositRecord(BaseModel):
+    id: int
+    date: date
+    amount: Money
+    created_at: datetime
+
+class WithdrawalRecord(DepositRecord):
+    pass
+
+class ImportResult(BaseModel):
+    kind: str
+    rows: int
+    balance_change: Money
+
+class Page(BaseModel, Generic[Item]):
+    """One page of a keyset-paginated listing; pass next_cursor back as ``cursor``."""
+    items: List[Item]
+    next_cursor: Optional[str] = None
+
+class PeriodRollup(BaseModel):
+    period_kind: str
+    period_start: date
+    profit: Money
+    loss: Money
+    entry_count: int
+    deposits: Money
+    withdrawals: Money
+
+    class Config:
+        from_attributes = True
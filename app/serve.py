@@ -0,0 +1,85 @@
+"""Production entry point: ``python -m app.serve``.
+
+Runs uvicorn with several worker processes and without auto-reload. All
+settings come from the environment so the same image works everywhere:
+
+    WEB_CONCURRENCY            worker processes (default: CPU count)
+    HOST / PORT                bind address (default 0.0.0.0:8000)
+    UVICORN_LOOP / UVICORN_HTTP  event loop and HTTP parser; "auto" picks
+                               uvloop and httptools when installed
+    GRACEFUL_TIMEOUT           seconds to drain in-flight requests on SIGTERM
+    KEEPALIVE_TIMEOUT          seconds an idle keep-alive connection stays open
+    FORWARDED_ALLOW_IPS        proxies trusted for X-Forwarded-* headers
+    PROMETHEUS_MULTIPROC_DIR   where workers write metrics for /metrics to
+                               aggregate; a temporary directory by default
+    LOG_LEVEL                  DEBUG, INFO (default), WARNING or ERROR
+"""
+import glob
+import os
+import tempfile
+
+import uvicorn
+from dotenv import load_dotenv
+
+from . import log
+
+load_dotenv()
+
+CPU_COUNT = os.cpu_count() or 1
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(CPU_COUNT)))
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+UVICORN_LOOP = os.getenv("UVICORN_LOOP", "auto")
+UVICORN_HTTP = os.getenv("UVICORN_HTTP", "auto")
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "5"))
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def main():
+    log.configure()
+
+    # Workers size their DB pools to share DB_MAX_CONNECTIONS (see database.py)
+    os.environ["WEB_CONCURRENCY"] = str(WEB_CONCURRENCY)
+
+    # Share the bcrypt processes between workers instead of starting a full
+    # set in each one; an explicit PASSWORD_HASH_WORKERS still wins.
+    os.environ.setdefault(
+        "PASSWORD_HASH_WORKERS", str(max(1, min(4, CPU_COUNT) // WEB_CONCURRENCY))
+    )
+
+    # Each worker writes its metrics to files here; leftovers from an earlier
+    # run would be counted again, so start from an empty directory
+    if WEB_CONCURRENCY > 1:
+        directory = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", tempfile.mkdtemp(prefix="journal-metrics-"))
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(stale)
+
+    # Migrate once here so workers starting together don't race on DDL
+    from .database import AUTO_MIGRATE, check_schema, upgrade_schema
+    if AUTO_MIGRATE:
+        upgrade_schema()
+        os.environ["AUTO_MIGRATE"] = "0"
+    check_schema()
+
+    uvicorn.run(
+        "app.main:app",
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        loop=UVICORN_LOOP,
+        http=UVICORN_HTTP,
+        reload=False,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        timeout_keep_alive=KEEPALIVE_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        # Logging is set up by app.log; the app writes its own access lines
+        log_config=None,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
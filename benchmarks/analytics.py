@@ -0,0 +1,138 @@
+"""Compare app.analytics.compute_metrics with a naive per-row Python loop.
+
+Builds synthetic journals (one entry per day plus a deposit or withdrawal
+every ~20 days), checks both implementations agree and reports the best of
+``--repeat`` runs for each:
+
+    python benchmarks/analytics.py --entries 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.analytics import Series, compute_metrics
+
+
+def make_series(entries: int, seed: int = 42) -> Series:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(date(1990, 1, 1), "D")
+    entry_dates = start + np.arange(entries)
+    pnl = rng.normal(5, 50, entries).round(2)
+    profit = np.where(pnl > 0, pnl, 0.0)
+    loss = np.where(pnl < 0, -pnl, 0.0)
+
+    flow_dates = entry_dates[::20]
+    flows = np.where(np.arange(len(flow_dates)) % 4 == 3, -200.0, 1000.0)
+
+    dates = np.concatenate((entry_dates, flow_dates))
+    order = np.argsort(dates, kind="stable")
+    zeros_e, zeros_f = np.zeros(entries), np.zeros(len(flow_dates))
+    return Series(
+        dates=dates[order],
+        profit=np.concatenate((profit, zeros_f))[order],
+        loss=np.concatenate((loss, zeros_f))[order],
+        flow=np.concatenate((zeros_e, flows))[order],
+        is_entry=np.concatenate((np.ones(entries, bool), np.zeros(len(flow_dates), bool)))[order],
+    )
+
+
+def naive_metrics(rows: list[tuple]) -> dict:
+    """Row-at-a-time reference implementation of the same statistics."""
+    days = {}
+    for day, profit, loss, flow, is_entry in rows:
+        agg = days.setdefault(day, [0.0, 0.0, 0.0, False])
+        agg[0] += profit
+        agg[1] += loss
+        agg[2] += flow
+        agg[3] = agg[3] or is_entry
+
+    growth = growth_peak = 1.0
+    balance = cumulative = pnl_peak = max_dd = 0.0
+    max_dd_pct = 0.0
+    gross_profit = gross_loss = 0.0
+    wins = losses = win_sum = loss_sum = 0
+    win_streak = loss_streak = best_win = best_loss = 0
+    curve = []
+    for day in sorted(days):
+        profit, loss, flow, is_entry = days[day]
+        pnl = profit - loss
+        base = balance + flow
+        growth *= 1 + (pnl / base if base > 0 else 0.0)
+        growth_peak = max(growth_peak, growth)
+        max_dd_pct = max(max_dd_pct, 1 - growth / growth_peak)
+        balance = base + pnl
+        curve.append(balance)
+        cumulative += pnl
+        pnl_peak = max(pnl_peak, cumulative)
+        max_dd = max(max_dd, pnl_peak - cumulative)
+        gross_profit += profit
+        gross_loss += loss
+        if is_entry:
+            if pnl > 0:
+                wins += 1
+                win_sum += pnl
+                win_streak, loss_streak = win_streak + 1, 0
+            elif pnl < 0:
+                losses += 1
+                loss_sum -= pnl
+                win_streak, loss_streak = 0, loss_streak + 1
+            else:
+                win_streak = loss_streak = 0
+            best_win = max(best_win, win_streak)
+            best_loss = max(best_loss, loss_streak)
+
+    return {
+        "closing_balance": balance,
+        "max_drawdown": max_dd,
+        "max_drawdown_pct": max_dd_pct,
+        "win_rate": wins / (wins + losses) if wins + losses else None,
+        "profit_factor": gross_profit / gross_loss if gross_loss else None,
+        "longest_win_streak": best_win,
+        "longest_loss_streak": best_loss,
+        "time_weighted_return": growth - 1,
+        "equity_points": len(curve),
+    }
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(args: argparse.Namespace) -> None:
+    for entries in args.entries:
+        series = make_series(entries)
+        rows = list(zip(series.dates.tolist(), series.profit.tolist(), series.loss.tolist(),
+                        series.flow.tolist(), series.is_entry.tolist()))
+
+        fast = compute_metrics(series)
+        slow = naive_metrics(rows)
+        for key in ("closing_balance", "max_drawdown", "max_drawdown_pct", "win_rate",
+                    "profit_factor", "time_weighted_return"):
+            assert np.isclose(fast[key], slow[key]), (key, fast[key], slow[key])
+        assert fast["longest_win_streak"] == slow["longest_win_streak"]
+        assert fast["longest_loss_streak"] == slow["longest_loss_streak"]
+
+        vectorized = best_of(args.repeat, compute_metrics, series)
+        naive = best_of(args.repeat, naive_metrics, rows)
+        print(
+            f"entries={entries:>7}  vectorized={vectorized * 1000:9.2f} ms  "
+            f"naive={naive * 1000:9.2f} ms  speedup={naive / vectorized:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
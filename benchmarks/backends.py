@@ -0,0 +1,99 @@
+"""Compare database backends on the dashboard read path.
+
+Seeds one user per database with ``--entries`` daily entries (plus a deposit
+every 20 days) through the bulk importer, then times the queries /dashboard
+runs on each request (version check, totals and the current month's
+calendar) from ``--threads`` threads at once, as the DB threadpool would:
+
+    python benchmarks/backends.py
+    python benchmarks/backends.py --database-url sqlite:////tmp/bench.db \\
+        mysql+pymysql://user:pw@localhost/bench
+
+Without --database-url a temporary SQLite file is used.
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy.orm import sessionmaker
+
+from app import models, crud, importer
+from app.database import create_app_engine
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def seed(Session, entries: int) -> tuple[int, date]:
+    with Session() as db:
+        user = models.User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.flush()
+        user_id = user.id
+        crud.get_user_stats(db, user_id)
+        db.commit()
+
+    last = date.today()
+    first = last - timedelta(days=entries - 1)
+    rows = ["date,profit,loss"]
+    for i in range(entries):
+        day = first + timedelta(days=i)
+        rows.append(f"{day},{i % 500 + 1},0" if i % 3 else f"{day},0,{i % 300 + 1}")
+    deposits = ["date,amount"] + [f"{first + timedelta(days=i)},1000" for i in range(0, entries, 20)]
+    with Session() as db:
+        importer.import_file(db, user_id, "daily-entries", io.BytesIO("\n".join(rows).encode()), "csv")
+        importer.import_file(db, user_id, "deposits", io.BytesIO("\n".join(deposits).encode()), "csv")
+    return user_id, last
+
+
+def dashboard_reads(Session, user_id: int, today: date) -> float:
+    start = time.perf_counter()
+    with Session() as db:
+        crud.get_user_version(db, user_id)
+        crud.get_dashboard_stats(db, user_id)
+        crud.get_calendar_month(db, user_id, today.year, today.month)
+    return (time.perf_counter() - start) * 1000
+
+
+def run(url: str, args: argparse.Namespace) -> None:
+    engine = create_app_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    user_id, today = seed(Session, args.entries)
+
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(lambda _: dashboard_reads(Session, user_id, today), range(args.threads)))  # warm up
+        start = time.perf_counter()
+        latencies = list(pool.map(lambda _: dashboard_reads(Session, user_id, today), range(args.requests)))
+        elapsed = time.perf_counter() - start
+    engine.dispose()
+
+    print(
+        f"{engine.dialect.name:<8} requests={args.requests:>6}  rate={args.requests / elapsed:8.1f}/s  "
+        f"p50={percentile(latencies, 50):6.2f} ms  p99={percentile(latencies, 99):6.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", nargs="+", default=None,
+                        help="defaults to a temporary SQLite file")
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        for url in args.database_url or [f"sqlite:///{os.path.join(scratch, 'bench.db')}"]:
+            run(url, args)
@@ -0,0 +1,54 @@
+"""CRUD reads and writes, and dashboard rendering, per journal size."""
+from datetime import date
+from itertools import count
+
+import pytest
+from starlette.requests import Request
+
+from app import crud, models, schemas
+
+
+def test_get_dashboard_stats(benchmark, db, user_id):
+    stats = benchmark(crud.get_dashboard_stats, db, user_id)
+    assert stats["total_deposited"] > 0
+
+
+def test_get_monthly_entries(benchmark, db, user_id):
+    today = date.today()
+    entries = benchmark(crud.get_monthly_entries, db, user_id, today.year, today.month)
+    assert len(entries) == today.day
+
+
+@pytest.mark.parametrize("day", ["latest", "oldest"])
+def test_update_daily_entry(benchmark, db, user_id, day):
+    # Editing the oldest day moves the closing balance of every later ledger month
+    order = models.DailyEntry.date.desc() if day == "latest" else models.DailyEntry.date.asc()
+    entry = db.query(models.DailyEntry).filter(models.DailyEntry.user_id == user_id).order_by(order).first()
+    original = schemas.DailyEntryCreate(
+        date=entry.date, profit=entry.profit, loss=entry.loss,
+        reason_profit=entry.reason_profit, reason_loss=entry.reason_loss,
+    )
+    rounds = count()
+
+    def update():
+        profit = original.profit + next(rounds) % 2
+        crud.update_daily_entry(db, entry.id, original.model_copy(update={"profit": profit}), user_id)
+
+    benchmark(update)
+    crud.update_daily_entry(db, entry.id, original, user_id)
+
+
+def test_render_dashboard_template(benchmark, db, user_id):
+    from app.main import templates
+    today = date.today()
+    context = {
+        "request": Request({"type": "http", "headers": [(b"cookie", b"access_token=x")]}),
+        "stats": crud.get_dashboard_stats(db, user_id),
+        "calendar": {"year": today.year, "month": today.month,
+                     "days": crud.get_calendar_month(db, user_id, today.year, today.month)},
+        "trading_tips": "",
+        "lessons_learned": "",
+    }
+    template = templates.get_template("dashboard.html")
+    html = benchmark(template.render, context)
+    assert "Trading Calendar" in html
@@ -0,0 +1,30 @@
+"""Full requests through the ASGI app (middleware, auth, DB threadpool, templates)."""
+from datetime import date
+from itertools import count
+
+from app import crud, schemas
+
+
+def test_dashboard(benchmark, client):
+    response = benchmark(client.get, "/dashboard")
+    assert response.status_code == 200
+
+
+def test_post_daily_entry(benchmark, client, db, user_id):
+    # Overwrites today's entry, alternating between two values, then restores it
+    entry = crud.get_daily_entry_by_date(db, user_id, date.today())
+    original = schemas.DailyEntryCreate(
+        date=entry.date, profit=entry.profit, loss=entry.loss,
+        reason_profit=entry.reason_profit, reason_loss=entry.reason_loss,
+    )
+    rounds = count()
+
+    def post():
+        return client.post("/daily-entry", data={
+            "date": date.today().isoformat(), "profit": str(100 + next(rounds) % 2), "loss": "0",
+            "reason_profit": "patience",
+        }, follow_redirects=False)
+
+    response = benchmark(post)
+    assert response.status_code == 303
+    crud.update_daily_entry(db, entry.id, original, user_id)
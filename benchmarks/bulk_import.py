@@ -0,0 +1,82 @@
+"""Benchmark the bulk daily-entry import and show its memory stays bounded.
+
+Generates CSV files of increasing size on disk, imports each one through
+app.importer.import_file into a scratch database and reports rows/s and the
+peak Python memory allocated during the import (via tracemalloc):
+
+    python benchmarks/bulk_import.py --rows 10000 100000
+    python benchmarks/bulk_import.py --database-url mysql+pymysql://user:pw@localhost/bench
+
+Peak memory should stay roughly flat as the row count grows, since rows are
+parsed and written IMPORT_BATCH_SIZE at a time.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy.orm import sessionmaker
+
+from app import models, importer
+from app.database import create_app_engine
+
+
+def write_csv(path: str, rows: int) -> None:
+    start = date(1990, 1, 1)
+    with open(path, "w") as f:
+        f.write("date,profit,loss,reason_profit,reason_loss\n")
+        for i in range(rows):
+            day = start + timedelta(days=i)
+            if i % 3:
+                f.write(f"{day},{i % 500 + 1},0,followed plan {i % 7},\n")
+            else:
+                f.write(f"{day},0,{i % 300 + 1},,chased entry {i % 5}\n")
+
+
+def run(database_url: str, rows: int) -> None:
+    engine = create_app_engine(database_url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    with Session() as db:
+        user = models.User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "entries.csv")
+        write_csv(path, rows)
+        size_mb = os.path.getsize(path) / 1e6
+
+        with Session() as db, open(path, "rb") as f:
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = importer.import_file(db, user_id, "daily-entries", f, "csv")
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    engine.dispose()
+    print(
+        f"rows={result['rows']:>8}  file={size_mb:7.1f} MB  time={elapsed:7.2f} s  "
+        f"rate={result['rows'] / elapsed:9.0f} rows/s  peak={peak / 1e6:6.1f} MB"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        url = args.database_url or f"sqlite:///{os.path.join(scratch, 'bench.db')}"
+        for count in args.rows:
+            run(url, count)
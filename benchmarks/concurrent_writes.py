@@ -0,0 +1,157 @@
+"""Stress concurrent writes for a single user and check nothing was lost.
+
+Starts ``--threads`` threads that each make ``--ops`` random writes for the
+same user (deposits, withdrawals, daily entries posted for a handful of
+shared days and edits of existing entries), each in its own session as the
+DB threadpool would. Half of the writes first load the user on that session,
+as authentication does when the identity cache misses, so the write starts
+with a transaction (and on MySQL a snapshot) already open. Afterwards it
+checks:
+
+  * the stored deposits and withdrawals add up to what the threads wrote;
+  * no day has more than one daily entry;
+  * the ledger's month closing balances add up and end at
+    deposits - withdrawals + profit - loss;
+  * user_stats and period_rollups agree with the raw tables.
+
+    python benchmarks/concurrent_writes.py
+    python benchmarks/concurrent_writes.py --database-url mysql+pymysql://user:pw@localhost/stress
+
+Exits non-zero if any check fails. Writes rejected by the database (lock
+timeouts, deadlocks) are counted and listed separately; they roll back
+cleanly and are left out of the expected totals. With 50 writers on one
+SQLite file, some waits can outlast the default SQLITE_BUSY_TIMEOUT of 5s.
+
+Without --database-url a temporary SQLite file is used. The target
+database's tables are dropped and recreated.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.database import create_app_engine
+from app.maintenance import reconcile_user_stats, verify_user_rollups
+
+
+def cents(rng: random.Random, high: int) -> Decimal:
+    return Decimal(rng.randint(1, high * 100)) / 100
+
+
+def write_once(Session, user_id: int, rng: random.Random, args: argparse.Namespace, written: dict,
+               lock: threading.Lock):
+    day = datetime(2025, 1, 1) + timedelta(days=rng.randrange(args.days))
+    action = rng.random()
+    with Session() as db:
+        if rng.random() < 0.5:
+            crud.get_user(db, user_id)
+        if action < 0.3:
+            amount = cents(rng, 500)
+            crud.create_deposit(db, schemas.DepositCreate(amount=amount, date=day), user_id)
+            with lock:
+                written["deposited"] += amount
+        elif action < 0.5:
+            amount = cents(rng, 200)
+            crud.create_withdrawal(db, schemas.WithdrawalCreate(amount=amount, date=day), user_id)
+            with lock:
+                written["withdrawn"] += amount
+        else:
+            pnl = cents(rng, 300)
+            entry = schemas.DailyEntryCreate(
+                date=day, profit=pnl if rng.random() < 0.6 else 0, loss=0 if rng.random() < 0.6 else pnl,
+                reason_profit="stress" if rng.random() < 0.2 else None,
+            )
+            existing = crud.get_daily_entry_by_date(db, user_id, day.date())
+            if action < 0.7 and existing is not None:
+                crud.update_daily_entry(db, existing.id, entry, user_id)
+            else:
+                crud.create_daily_entry(db, entry, user_id)
+
+
+def writer(Session, user_id: int, seed: int, args: argparse.Namespace, written: dict,
+           lock: threading.Lock, failures: list):
+    rng = random.Random(seed)
+    for _ in range(args.ops):
+        try:
+            write_once(Session, user_id, rng, args, written, lock)
+        except Exception as e:
+            with lock:
+                failures.append(e)
+
+
+def check(Session, user_id: int, written: dict) -> list[str]:
+    problems = []
+    with Session() as db:
+        totals = crud.compute_user_totals(db, user_id)
+        if totals["total_deposited"] != written["deposited"]:
+            problems.append(f"deposits: stored {totals['total_deposited']}, written {written['deposited']}")
+        if totals["total_withdrawn"] != written["withdrawn"]:
+            problems.append(f"withdrawals: stored {totals['total_withdrawn']}, written {written['withdrawn']}")
+
+        duplicates = db.query(models.DailyEntry.date, func.count(models.DailyEntry.id)).filter(
+            models.DailyEntry.user_id == user_id
+        ).group_by(models.DailyEntry.date).having(func.count(models.DailyEntry.id) > 1).all()
+        problems += [f"{count} daily entries on {day}" for day, count in duplicates]
+
+        problems += reconcile_user_stats(db, user_id)
+        problems += verify_user_rollups(db, user_id)
+    return problems
+
+
+def run(url: str, args: argparse.Namespace) -> int:
+    engine = create_app_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        user = models.User(email="stress@example.com", username="stress", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    written = {"deposited": Decimal("0"), "withdrawn": Decimal("0")}
+    lock = threading.Lock()
+    failures = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        for seed in range(args.threads):
+            pool.submit(writer, Session, user_id, seed, args, written, lock, failures)
+    elapsed = time.perf_counter() - start
+
+    problems = check(Session, user_id, written)
+    engine.dispose()
+
+    writes = args.threads * args.ops
+    print(f"{engine.dialect.name:<8} writes={writes:>6}  rate={writes / elapsed:8.1f}/s  "
+          f"rejected={len(failures)}  problems={len(problems)}")
+    reasons = Counter(f"{type(e).__name__}: {getattr(e, 'orig', e)}" for e in failures)
+    for reason, count in reasons.most_common():
+        print(f"  rejected {count}x  {reason}")
+    for problem in problems:
+        print(f"  {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--threads", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=40, help="writes per thread")
+    parser.add_argument("--days", type=int, default=10, help="distinct days the entries land on")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        sys.exit(run(args.database_url or f"sqlite:///{os.path.join(scratch, 'stress.db')}", args))
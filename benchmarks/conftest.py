@@ -0,0 +1,85 @@
+"""Fixtures for the pytest-benchmark suite (benchmarks/bench_*.py).
+
+    pip install -r benchmarks/requirements.txt
+    pytest benchmarks --benchmark-autosave          # saves .benchmarks/<machine>/NNNN_<commit>.json
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:15%
+    pytest benchmarks --bench-sizes 1000,10000 --benchmark-json=bench.json
+
+The suite migrates a fresh SQLite database and seeds it with datagen: one
+user per size (1k/10k/100k daily entries by default, seed 0). Set
+BENCH_DATABASE_URL to reuse a database between runs (users already seeded
+are kept) or to benchmark against MySQL.
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+# app.main loads its templates and static files relative to the repository root
+os.chdir(ROOT)
+
+# The app reads its settings at import time, so set them before anything imports it
+_scratch = tempfile.mkdtemp(prefix="journal-bench-")
+os.environ["DATABASE_URL"] = os.getenv("BENCH_DATABASE_URL", f"sqlite:///{os.path.join(_scratch, 'bench.db')}")
+os.environ.setdefault("JWT_SECRET", "bench")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["GEMINI_API_KEY"] = ""  # insights fall back to the local summary
+os.environ["PASSWORD_HASH_WORKERS"] = "0"  # nothing here logs in through bcrypt
+
+import datagen
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-sizes", default=",".join(map(str, datagen.SIZES)),
+                     help="comma-separated daily entry counts, one seeded user each")
+    parser.addoption("--bench-seed", type=int, default=0)
+
+
+def _sizes(config) -> list[int]:
+    return [int(size) for size in config.getoption("bench_sizes").split(",")]
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        metafunc.parametrize("size", _sizes(metafunc.config), scope="session")
+
+
+@pytest.fixture(scope="session")
+def seeded(request):
+    """{size: user_id} for the seeded users."""
+    from app.database import SessionLocal, upgrade_schema
+    upgrade_schema()
+    return datagen.seed_users(SessionLocal, _sizes(request.config), request.config.getoption("bench_seed"))
+
+
+@pytest.fixture(scope="session")
+def user_id(seeded, size):
+    return seeded[size]
+
+
+@pytest.fixture
+def db():
+    from app.database import SessionLocal
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture(scope="session")
+def app_client(seeded):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def client(app_client, user_id):
+    """The test client, logged in as the seeded user."""
+    from app import auth
+    token = auth.create_access_token({"sub": str(user_id), "sub_type": "user_id"})
+    app_client.cookies.set("access_token", f"Bearer {token}")
+    yield app_client
+    app_client.cookies.clear()
@@ -0,0 +1,117 @@
+"""Seeded synthetic journals for benchmarks.
+
+Creates one user per requested size with that many daily entries (one per
+day, ending today), plus a deposit every 20 days and a withdrawal every 50.
+Amounts, reasons and which days win or lose are drawn from a generator
+seeded with ``--seed`` and the size, so the same seed and size always
+produce the same journal. Raw rows are
+bulk-inserted; totals, the ledger and rollups are then derived by the same
+repair code as ``python -m app.maintenance``.
+
+    python benchmarks/datagen.py --database-url sqlite:///bench.db --sizes 1000 10000 100000
+
+The target database must already be at the latest migration. Users are named
+``bench<size>`` unless given a name, and all have the password ``PASSWORD``;
+existing ones are left as they are.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import crud, models, schemas
+from app.database import create_app_engine
+from app.maintenance import reconcile_user_stats
+
+SIZES = (1000, 10000, 100000)
+PASSWORD = "bench-password"
+# bcrypt hash of PASSWORD, so seeding doesn't spend time hashing
+HASHED_PASSWORD = "$2b$12$ghoL39c5ZXiuKyLJ9gxPqOv.B39Jp6oRerYJ0hojMJ4D7VxKQndXK"
+REASONS_PROFIT = ["followed plan", "patience", "good entry", "cut losers early", "trend day", None, None]
+REASONS_LOSS = ["fomo", "overtrading", "moved stop", "revenge trade", "news spike", None, None]
+INSERT_BATCH = 5000
+
+
+def username(size: int) -> str:
+    return f"bench{size}"
+
+
+def _cents(rng: random.Random, high: int) -> Decimal:
+    return Decimal(rng.randint(1, high * 100)) / 100
+
+
+def journal_rows(size: int, seed: int, end: date) -> tuple[list[dict], list[dict], list[dict]]:
+    """Daily entries, deposits and withdrawals (without user_id) for a journal of ``size`` days."""
+    rng = random.Random(f"{seed}:{size}")
+    first = end - timedelta(days=size - 1)
+    entries, deposits, withdrawals = [], [], []
+    for i in range(size):
+        day = first + timedelta(days=i)
+        profit = _cents(rng, 400) if rng.random() < 0.55 else Decimal("0")
+        loss = _cents(rng, 300) if rng.random() < 0.45 else Decimal("0")
+        entries.append({
+            "date": day, "profit": profit, "loss": loss,
+            "reason_profit": rng.choice(REASONS_PROFIT) if profit else None,
+            "reason_loss": rng.choice(REASONS_LOSS) if loss else None,
+        })
+        if i % 20 == 0:
+            deposits.append({"date": day, "amount": _cents(rng, 2000)})
+        if i % 50 == 25:
+            withdrawals.append({"date": day, "amount": _cents(rng, 500)})
+    return entries, deposits, withdrawals
+
+
+def _insert(db: Session, table, user_id: int, rows: list[dict]) -> None:
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.execute(insert(table), [dict(row, user_id=user_id) for row in rows[start:start + INSERT_BATCH]])
+
+
+def seed_user(db: Session, size: int, seed: int = 0, end: Optional[date] = None,
+              name: Optional[str] = None) -> int:
+    """Create (or find) user ``name`` (default ``bench<size>``) with a seeded journal and return its id."""
+    name = name or username(size)
+    existing = crud.get_user_by_username(db, name)
+    if existing is not None:
+        return existing.id
+    user = crud.create_user(
+        db, schemas.UserCreate(email=f"{name}@example.com", username=name, password=PASSWORD),
+        hashed_password=HASHED_PASSWORD,
+    )
+    entries, deposits, withdrawals = journal_rows(size, seed, end or date.today())
+    _insert(db, models.DailyEntry.__table__, user.id, entries)
+    _insert(db, models.Deposit.__table__, user.id, deposits)
+    _insert(db, models.Withdrawal.__table__, user.id, withdrawals)
+    db.commit()
+
+    # Derive totals, ledger and rollups from the raw rows
+    reconcile_user_stats(db, user.id, fix=True)
+    crud.rebuild_user_rollups(db, user.id)
+    db.commit()
+    return user.id
+
+
+def seed_users(Session, sizes=SIZES, seed: int = 0, end: Optional[date] = None) -> dict:
+    """Seed one user per size; returns {size: user_id}."""
+    with Session() as db:
+        return {size: seed_user(db, size, seed, end) for size in sizes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_app_engine(args.database_url)
+    for size, user_id in seed_users(sessionmaker(bind=engine, autoflush=False), args.sizes, args.seed).items():
+        print(f"{username(size)}: user {user_id}, {size} daily entries")
+    engine.dispose()
@@ -0,0 +1,93 @@
+"""Time history pages at increasing depth: keyset cursor vs OFFSET.
+
+Seeds one user with ``--rows`` deposits spread over ten years, then fetches
+pages of ``--limit`` rows starting at several depths, once through
+crud.get_history_page (as /api/deposits does) and once with the equivalent
+LIMIT/OFFSET query. Keyset pages should cost the same at any depth:
+
+    python benchmarks/history_pages.py --rows 100000
+    python benchmarks/history_pages.py --database-url mysql+pymysql://user:pw@localhost/bench
+
+Without --database-url a temporary SQLite file is used. The target
+database's tables are dropped and recreated.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.database import create_app_engine
+
+
+def seed(Session, rows: int) -> int:
+    with Session() as db:
+        user = models.User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        first = date.today() - timedelta(days=3650)
+        db.execute(insert(models.Deposit.__table__), [
+            {"user_id": user_id, "amount": i % 1000 + 1, "date": first + timedelta(days=i * 3650 // rows)}
+            for i in range(rows)
+        ])
+        db.commit()
+    return user_id
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(url: str, args: argparse.Namespace) -> None:
+    engine = create_app_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    user_id = seed(Session, args.rows)
+
+    with Session() as db:
+        # Cursor at the start of each depth, found by walking the keyset pages once
+        depths = sorted({int(args.rows * f) // args.limit * args.limit for f in (0, 0.1, 0.5, 0.9)})
+        cursors = {}
+        after = None
+        for offset in range(0, max(depths) + 1, args.limit):
+            if offset in depths:
+                cursors[offset] = after
+            _, after = crud.get_history_page(db, user_id, "deposits", after=after, limit=args.limit)
+
+        columns = crud.HISTORY_COLUMNS["deposits"]
+        print(f"{engine.dialect.name}: {args.rows} rows, {args.limit} per page (best of {args.repeat})")
+        for offset in depths:
+            keyset = best_of(args.repeat, lambda: crud.get_history_page(
+                db, user_id, "deposits", after=cursors[offset], limit=args.limit
+            ))
+            paged = best_of(args.repeat, lambda: db.query(*columns).filter(
+                models.Deposit.user_id == user_id
+            ).order_by(models.Deposit.date.desc(), models.Deposit.id.desc()).offset(offset).limit(args.limit).all())
+            print(f"  row {offset:>8}  keyset={keyset:7.2f} ms  offset={paged:7.2f} ms")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        run(args.database_url or f"sqlite:///{os.path.join(scratch, 'bench.db')}", args)
@@ -0,0 +1,120 @@
+"""Measure /dashboard latency while /api/insights is stuck on a slow Gemini.
+
+Starts a local stub that stands in for the Gemini endpoint and answers every
+request after ``--upstream-delay`` seconds. The app under test must point at
+the stub and have an API key set so it actually calls out:
+
+    GEMINI_API_KEY=dummy GEMINI_API_URL=http://127.0.0.1:8099/generate \
+        uvicorn app.main:app --port 8000
+
+    python benchmarks/insights_blocking.py --username alice --password secret
+
+The script first measures /dashboard on an idle server, then again while
+``--insights-clients`` clients keep /api/insights busy, and prints p50/p99 for
+both phases. With blocking work on the event loop the loaded p99 grows with the
+upstream delay; with the work offloaded it should stay flat.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+
+def start_stub_gemini(port: int, delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            body = json.dumps(
+                {"candidates": [{"content": {"parts": [{"text": "- stub insight"}]}}]}
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> None:
+    response = await client.post("/token", data={"username": username, "password": password})
+    if "access_token" not in client.cookies:
+        raise SystemExit(f"Login failed (HTTP {response.status_code})")
+
+
+async def measure_dashboard(client: httpx.AsyncClient, requests: int) -> list[float]:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get("/dashboard")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def hammer_insights(client: httpx.AsyncClient, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        await client.get("/api/insights")
+
+
+def report(label: str, latencies: list[float]) -> None:
+    print(
+        f"{label:<10} n={len(latencies):<5} "
+        f"p50={statistics.median(latencies):8.1f} ms  "
+        f"p99={percentile(latencies, 99):8.1f} ms  "
+        f"max={max(latencies):8.1f} ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    stub = start_stub_gemini(args.stub_port, args.upstream_delay)
+    limits = httpx.Limits(max_connections=args.insights_clients + 10)
+    timeout = httpx.Timeout(args.upstream_delay * 4 + 30)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        await login(client, args.username, args.password)
+
+        idle = await measure_dashboard(client, args.requests)
+
+        stop = asyncio.Event()
+        background = [
+            asyncio.create_task(hammer_insights(client, stop))
+            for _ in range(args.insights_clients)
+        ]
+        # Give the insight requests time to reach the stub before measuring
+        await asyncio.sleep(0.5)
+        loaded = await measure_dashboard(client, args.requests)
+        stop.set()
+        await asyncio.gather(*background, return_exceptions=True)
+
+    stub.shutdown()
+    report("idle", idle)
+    report("loaded", loaded)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=200, help="dashboard requests per phase")
+    parser.add_argument("--insights-clients", type=int, default=8)
+    parser.add_argument("--upstream-delay", type=float, default=2.0, help="stub Gemini delay (s)")
+    parser.add_argument("--stub-port", type=int, default=8099)
+    asyncio.run(main(parser.parse_args()))
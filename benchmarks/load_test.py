@@ -0,0 +1,258 @@
+"""Load-test the production server with a realistic mix of trader traffic.
+
+Seeds ``--traders`` accounts with ``--history`` days of journal each (see
+datagen.py), starts a stub Gemini server and, for every combination of
+``--workers`` and ``--pool-sizes``, starts ``python -m app.serve`` against
+that database and runs one virtual trader per account for ``--duration``
+seconds. Each trader logs in, then keeps picking actions at random by their
+``--mix`` weights, pausing about ``--think`` seconds in between:
+
+  login      POST /token again (a bcrypt check)
+  dashboard  GET /dashboard, then the GET /api/insights the page makes
+  edit       POST /daily-entry for one of the last 30 days
+  deposit    POST /deposit
+
+Throughput, latency percentiles and error rates are printed per request type
+and overall for each configuration, and optionally written as JSON:
+
+    python benchmarks/load_test.py --traders 50 --workers 1 2 4 --pool-sizes 5 15
+    python benchmarks/load_test.py --database-url mysql+pymysql://user:pw@localhost/load --json load.json
+    python benchmarks/load_test.py --mix dashboard=8,edit=2 --think 0.5 --upstream-delay 1
+
+Without --database-url a temporary SQLite file is used; several workers
+writing to one SQLite file mostly measure its write lock, so size real
+deployments against MySQL. A pool size sets DB_POOL_SIZE of each worker;
+the DB threadpool follows it (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+To script another request type, add a coroutine to ACTIONS and give it a
+weight in --mix.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import httpx
+
+from insights_blocking import start_stub_gemini
+from throughput import percentile, wait_ready
+
+DEFAULT_MIX = "login=1,dashboard=10,edit=3,deposit=1"
+
+
+@dataclass
+class Trader:
+    username: str
+    password: str
+    rng: random.Random
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    def add(self, label: str, ms: float, error: Optional[str] = None) -> None:
+        self.latencies[label].append(ms)
+        if error is not None:
+            self.errors[label][error] += 1
+
+
+async def timed(results: Results, label: str, request, expected: int):
+    """Await ``request``, recording its latency and any unexpected status or transport error."""
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        results.add(label, (time.perf_counter() - start) * 1000, type(e).__name__)
+        return None
+    ok = response.status_code == expected
+    results.add(label, (time.perf_counter() - start) * 1000, None if ok else str(response.status_code))
+    return response if ok else None
+
+
+async def login(client: httpx.AsyncClient, trader: Trader, results: Results) -> None:
+    await timed(results, "login", client.post(
+        "/token", data={"username": trader.username, "password": trader.password}, follow_redirects=False
+    ), 303)
+
+
+async def dashboard(client: httpx.AsyncClient, trader: Trader, results: Results) -> None:
+    if await timed(results, "dashboard", client.get("/dashboard"), 200) is not None:
+        await timed(results, "insights", client.get("/api/insights"), 200)
+
+
+async def edit(client: httpx.AsyncClient, trader: Trader, results: Results) -> None:
+    day = date.today() - timedelta(days=trader.rng.randrange(30))
+    profit = trader.rng.randint(0, 40000) / 100
+    loss = trader.rng.randint(0, 30000) / 100 if trader.rng.random() < 0.4 else 0
+    await timed(results, "edit", client.post("/daily-entry", data={
+        "date": day.isoformat(), "profit": str(profit), "loss": str(loss),
+        "reason_profit": trader.rng.choice(["patience", "followed plan", ""]),
+        "reason_loss": trader.rng.choice(["fomo", "overtrading", ""]) if loss else "",
+    }, follow_redirects=False), 303)
+
+
+async def deposit(client: httpx.AsyncClient, trader: Trader, results: Results) -> None:
+    await timed(results, "deposit", client.post("/deposit", data={
+        "amount": str(trader.rng.randint(100, 200000) / 100), "date": date.today().isoformat(),
+    }, follow_redirects=False), 303)
+
+
+ACTIONS = {"login": login, "dashboard": dashboard, "edit": edit, "deposit": deposit}
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ACTIONS:
+            raise SystemExit(f"Unknown action {name!r} in --mix; choose from {', '.join(ACTIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+async def trader_loop(base_url: str, trader: Trader, args: argparse.Namespace, stop_at: float,
+                      results: Results) -> None:
+    names, weights = zip(*args.mix.items())
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout) as client:
+        # Spread the first logins over a second instead of one bcrypt burst
+        await asyncio.sleep(trader.rng.random())
+        await login(client, trader, results)
+        while time.monotonic() < stop_at:
+            await ACTIONS[trader.rng.choices(names, weights)[0]](client, trader, results)
+            if args.think:
+                await asyncio.sleep(trader.rng.expovariate(1 / args.think))
+
+
+def seed_traders(args: argparse.Namespace) -> list[Trader]:
+    # The app reads DATABASE_URL when first imported
+    from app.database import SessionLocal, upgrade_schema
+    import datagen
+    upgrade_schema()
+    traders = []
+    with SessionLocal() as db:
+        for i in range(args.traders):
+            name = f"trader{i}"
+            datagen.seed_user(db, args.history, seed=i, name=name)
+            traders.append(Trader(name, datagen.PASSWORD, random.Random(i)))
+    return traders
+
+
+def start_server(args: argparse.Namespace, workers: int, pool_size: int) -> subprocess.Popen:
+    env = dict(
+        os.environ, WEB_CONCURRENCY=str(workers), PORT=str(args.port), HOST="127.0.0.1", AUTO_MIGRATE="0",
+        DB_POOL_SIZE=str(pool_size),
+        GEMINI_API_KEY="stub", GEMINI_API_URL=f"http://127.0.0.1:{args.stub_port}/generate",
+    )
+    env.setdefault("JWT_SECRET", "load-test")
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.serve"], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def summarize(results: Results, elapsed: float) -> dict:
+    summary = {}
+    everything = []
+    for label, latencies in sorted(results.latencies.items()):
+        everything += latencies
+        summary[label] = _stats(latencies, sum(results.errors[label].values()), elapsed)
+        summary[label]["errors"] = dict(results.errors[label])
+    total_errors = sum(sum(errors.values()) for errors in results.errors.values())
+    summary["all"] = _stats(everything, total_errors, elapsed)
+    return summary
+
+
+def _stats(latencies: list[float], errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {"count": 0, "rps": 0.0, "error_rate": 0.0}
+    return {
+        "count": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "error_rate": round(errors / len(latencies), 4),
+    }
+
+
+def report(workers: int, pool_size: int, summary: dict) -> None:
+    print(f"workers={workers} pool={pool_size}")
+    for label, stats in summary.items():
+        if not stats["count"]:
+            continue
+        print(f"  {label:<10} n={stats['count']:>7}  rps={stats['rps']:8.1f}  p50={stats['p50_ms']:7.1f} ms  "
+              f"p95={stats['p95_ms']:7.1f} ms  p99={stats['p99_ms']:7.1f} ms  errors={stats['error_rate']:.2%}")
+        for error, count in stats.get("errors", {}).items():
+            print(f"  {'':<10} {count}x {error}")
+
+
+async def run_config(args: argparse.Namespace, traders: list[Trader], workers: int, pool_size: int) -> dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(args, workers, pool_size)
+    try:
+        await wait_ready(base_url)
+        results = Results()
+        start = time.monotonic()
+        stop_at = start + args.duration
+        await asyncio.gather(*(trader_loop(base_url, trader, args, stop_at, results) for trader in traders))
+        elapsed = time.monotonic() - start
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    return summarize(results, elapsed)
+
+
+async def main(args: argparse.Namespace) -> None:
+    traders = seed_traders(args)
+    stub = start_stub_gemini(args.stub_port, args.upstream_delay)
+    runs = []
+    try:
+        for workers, pool_size in itertools.product(args.workers, args.pool_sizes):
+            summary = await run_config(args, traders, workers, pool_size)
+            report(workers, pool_size, summary)
+            runs.append({"workers": workers, "pool_size": pool_size, "requests": summary})
+    finally:
+        stub.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "traders": args.traders, "duration": args.duration, "think": args.think,
+                "mix": args.mix, "runs": runs,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--traders", type=int, default=50, help="concurrent virtual traders, one account each")
+    parser.add_argument("--history", type=int, default=250, help="days of journal seeded per trader")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--think", type=float, default=0.0, help="mean seconds between a trader's actions")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[15])
+    parser.add_argument("--upstream-delay", type=float, default=0.5, help="stub Gemini delay (s)")
+    parser.add_argument("--timeout", type=float, default=60, help="per-request client timeout (s)")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--stub-port", type=int, default=8099)
+    parser.add_argument("--json", default=None, help="also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(scratch, 'load.db')}"
+        asyncio.run(main(args))
@@ -0,0 +1,126 @@
+"""Time the logging done by one /token request, before and after app.log.
+
+Drives a stub ASGI app through the logging that a successful login does:
+
+  * print:  the old handler's print() calls, plus uvicorn's default access
+            log line written synchronously to stdout;
+  * INFO:   app.log's pipeline (RequestIdMiddleware and the queue) at the
+            default level, where the handler's debug calls are skipped;
+  * INFO/10: the same with ACCESS_LOG_SAMPLE_RATE=0.1;
+  * DEBUG:  the same pipeline with the debug lines switched on.
+
+Output goes to a pipe drained by a child process, line-buffered as with a tty
+or PYTHONUNBUFFERED=1. The reported time is what the request itself spends
+(the event loop is blocked for all of it); for the queue, the time the
+listener thread needs to catch up is reported separately. --reader-delay
+slows the reader down, as a stalled log collector would: print() then
+blocks the loop, while the queue drops lines and keeps serving.
+
+    python benchmarks/logging_overhead.py
+    python benchmarks/logging_overhead.py --reader-delay 0.0005 --requests 2000
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import log
+
+logger = logging.getLogger("app.main")
+FORM = {"username": "bench", "password": "hunter2"}
+
+
+async def send(message):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def respond(send):
+    await send({"type": "http.response.start", "status": 303, "headers": [(b"location", b"/dashboard")]})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def login_with_prints(scope, receive, send):
+    print("\n=== Login Request ===")
+    print(f"Form data: {FORM}")
+    print(f"Login attempt for username: {FORM['username']}")
+    print("User found, verifying password...")
+    print("Password verified successfully")
+    await respond(send)
+
+
+async def login_with_logging(scope, receive, send):
+    logger.debug("Login attempt for username %s", FORM["username"])
+    logger.debug("User %d logged in", 1)
+    await respond(send)
+
+
+def uvicorn_access_log(app):
+    # What uvicorn's default config did: a StreamHandler on uvicorn.access
+    access = logging.getLogger("bench.uvicorn.access")
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter('%(levelname)s:     %(message)s'))
+    access.addHandler(handler)
+    access.propagate = False
+    access.setLevel(logging.INFO)
+
+    async def wrapped(scope, receive, send):
+        await app(scope, receive, send)
+        access.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:50000", scope["method"], scope["path"], "1.1", 303)
+    return wrapped
+
+
+async def drive(app, requests: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/token", "headers": []}
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def report(name: str, elapsed: float, requests: int, extra: str = "") -> None:
+    print(f"{name:<7} {elapsed / requests * 1e6:8.1f} us/request{extra}", file=sys.stderr)
+
+
+def main(args: argparse.Namespace) -> None:
+    # A child process drains the pipe the way a container log driver would
+    reader = f"import sys, time\nfor _ in sys.stdin.buffer: time.sleep({args.reader_delay})"
+    drain = subprocess.Popen([sys.executable, "-c", reader], stdin=subprocess.PIPE)
+    sys.stdout = io.TextIOWrapper(drain.stdin, line_buffering=True)
+
+    elapsed = asyncio.run(drive(uvicorn_access_log(login_with_prints), args.requests))
+    report("print", elapsed, args.requests)
+
+    log.configure()
+    app = log.RequestIdMiddleware(login_with_logging)
+    for name, level, rate in (("INFO", "INFO", 1.0), ("INFO/10", "INFO", 0.1), ("DEBUG", "DEBUG", 1.0)):
+        logging.getLogger().setLevel(level)
+        log.ACCESS_LOG_SAMPLE_RATE = rate
+        dropped = log.stats()["dropped"]
+        elapsed = asyncio.run(drive(app, args.requests))
+        start = time.perf_counter()
+        while log.stats()["queued"]:
+            time.sleep(0.001)
+        backlog = time.perf_counter() - start
+        report(name, elapsed, args.requests,
+               f"  (listener caught up {backlog * 1000:.0f} ms later, dropped {log.stats()['dropped'] - dropped})")
+
+    log.shutdown()
+    sys.stdout.close()
+    drain.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--reader-delay", type=float, default=0.0, help="seconds the reader sleeps per line")
+    main(parser.parse_args())
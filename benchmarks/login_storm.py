@@ -0,0 +1,74 @@
+"""Fire a burst of concurrent /token logins and report throughput and latency.
+
+Run it once against a server using the pooled hasher (the default) and once
+against a server started with PASSWORD_HASH_WORKERS=0, which hashes inline
+like the original code did:
+
+    uvicorn app.main:app --port 8000
+    python benchmarks/login_storm.py --username alice --password secret
+
+    PASSWORD_HASH_WORKERS=0 uvicorn app.main:app --port 8000
+    python benchmarks/login_storm.py --username alice --password secret
+
+Pass --register to create the account first.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def login_once(client: httpx.AsyncClient, username: str, password: str) -> tuple[float, bool]:
+    start = time.perf_counter()
+    response = await client.post(
+        "/token", data={"username": username, "password": password}, follow_redirects=False
+    )
+    ok = response.status_code == 303 and "access_token" in response.cookies
+    return (time.perf_counter() - start) * 1000, ok
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=120) as client:
+        if args.register:
+            await client.post(
+                "/register",
+                data={
+                    "email": f"{args.username}@example.com",
+                    "username": args.username,
+                    "password": args.password,
+                },
+            )
+
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(login_once(client, args.username, args.password) for _ in range(args.logins))
+        )
+        elapsed = time.perf_counter() - start
+
+    latencies = [latency for latency, _ in results]
+    failures = sum(1 for _, ok in results if not ok)
+    print(f"logins:      {args.logins} ({failures} failed)")
+    print(f"elapsed:     {elapsed:.2f} s")
+    print(f"throughput:  {args.logins / elapsed:.1f} logins/s")
+    print(f"latency p50: {statistics.median(latencies):.1f} ms")
+    print(f"latency p99: {percentile(latencies, 99):.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--register", action="store_true")
+    asyncio.run(main(parser.parse_args()))
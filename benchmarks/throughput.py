@@ -0,0 +1,112 @@
+"""Measure requests/sec of ``python -m app.serve`` as the worker count grows.
+
+For each value of ``--workers`` the script starts the production server with
+WEB_CONCURRENCY set accordingly, logs in, keeps ``--concurrency`` clients busy
+on authenticated read endpoints for ``--duration`` seconds and then stops the
+server with SIGTERM, as a container runtime would. The server uses the
+database configured in the environment / .env (the MySQL service from
+docker-compose, for example):
+
+    python benchmarks/throughput.py --workers 1 2 4 --concurrency 64
+
+Requests/sec should scale roughly with workers until the CPU cores or the
+database connections run out.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port), HOST="127.0.0.1")
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.serve"], cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def wait_ready(base_url: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/login")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+    raise SystemExit(f"Server at {base_url} did not start")
+
+
+async def worker_loop(client: httpx.AsyncClient, paths: list[str], stop_at: float,
+                      latencies: list[float], errors: list[int]) -> None:
+    i = 0
+    while time.monotonic() < stop_at:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        response = await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            errors.append(response.status_code)
+
+
+async def run_load(args: argparse.Namespace, base_url: str) -> tuple[float, list[float], list[int]]:
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await client.post("/register", data={
+            "email": f"{args.username}@example.com", "username": args.username, "password": args.password,
+        })
+        await client.post("/token", data={"username": args.username, "password": args.password})
+        if "access_token" not in client.cookies:
+            raise SystemExit("Login failed")
+
+        latencies, errors = [], []
+        start = time.monotonic()
+        stop_at = start + args.duration
+        await asyncio.gather(*(
+            worker_loop(client, args.paths, stop_at, latencies, errors) for _ in range(args.concurrency)
+        ))
+        return time.monotonic() - start, latencies, errors
+
+
+async def main(args: argparse.Namespace) -> None:
+    for workers in args.workers:
+        base_url = f"http://127.0.0.1:{args.port}"
+        server = start_server(workers, args.port)
+        try:
+            await wait_ready(base_url)
+            elapsed, latencies, errors = await run_load(args, base_url)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        print(
+            f"workers={workers:>2}  requests={len(latencies):>7}  rps={len(latencies) / elapsed:8.1f}  "
+            f"p50={percentile(latencies, 50):7.1f} ms  p99={percentile(latencies, 99):7.1f} ms  "
+            f"errors={len(errors)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--paths", nargs="+", default=["/dashboard", "/api/rollups?period=month"])
+    parser.add_argument("--username", default="bench")
+    parser.add_argument("--password", default="bench-password")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+"""Summary tables (user_stats, monthly_insights, period_rollups) and (user_id, date) indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+user_stats and period_rollups are filled lazily by the application from the
+raw tables, so existing data needs no backfill here.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT user_id, date, COUNT(id) FROM daily_entries "
+        "GROUP BY user_id, date HAVING COUNT(id) > 1"
+    )).all()
+    if duplicates:
+        listing = "\n".join(f"  user {u}: {n} daily entries on {d}" for u, d, n in duplicates)
+        raise RuntimeError(
+            "The unique (user_id, date) index on daily_entries cannot be built until "
+            f"these duplicates are merged:\n{listing}"
+        )
+
+    op.create_index("ix_deposits_user_date", "deposits", ["user_id", "date"])
+    op.create_index("ix_withdrawals_user_date", "withdrawals", ["user_id", "date"])
+    op.create_index("ix_daily_entries_user_date", "daily_entries", ["user_id", "date"], unique=True)
+
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("total_deposited", sa.Float(), nullable=False),
+        sa.Column("total_withdrawn", sa.Float(), nullable=False),
+        sa.Column("total_profit", sa.Float(), nullable=False),
+        sa.Column("total_loss", sa.Float(), nullable=False),
+        sa.Column("rollups_ready", sa.Boolean(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    op.create_table(
+        "period_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("period_kind", sa.String(length=8), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("profit", sa.Float(), nullable=False),
+        sa.Column("loss", sa.Float(), nullable=False),
+        sa.Column("entry_count", sa.Integer(), nullable=False),
+        sa.Column("deposits", sa.Float(), nullable=False),
+        sa.Column("withdrawals", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "period_kind", "period_start"),
+    )
+    op.create_table(
+        "monthly_insights",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("reasons_hash", sa.String(length=64), nullable=False),
+        sa.Column("trading_tips", sa.Text(), nullable=True),
+        sa.Column("lessons_learned", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "year", "month"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_insights")
+    op.drop_table("period_rollups")
+    op.drop_table("user_stats")
+    op.drop_index("ix_daily_entries_user_date", table_name="daily_entries")
+    op.drop_index("ix_withdrawals_user_date", table_name="withdrawals")
+    op.drop_index("ix_deposits_user_date", table_name="deposits")
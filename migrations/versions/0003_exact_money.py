@@ -0,0 +1,71 @@
+"""Store money as NUMERIC(14, 2) and recompute balances and totals exactly
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Existing float amounts are rounded to cents, then every user's active_balance
+and user_stats totals are recomputed from the raw tables, discarding any drift
+accumulated by incremental float updates. Period rollups are rebuilt from the
+raw tables on each user's next write.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = {
+    "users": {"active_balance": True},
+    "deposits": {"amount": True},
+    "withdrawals": {"amount": True},
+    "daily_entries": {"profit": True, "loss": True},
+    "user_stats": {"total_deposited": False, "total_withdrawn": False, "total_profit": False, "total_loss": False},
+    "period_rollups": {"profit": False, "loss": False, "deposits": False, "withdrawals": False},
+}
+
+
+def _convert(old_type, new_type) -> None:
+    for table, columns in MONEY_COLUMNS.items():
+        if old_type is sa.Float:
+            assignments = ", ".join(f"{column} = ROUND({column}, 2)" for column in columns)
+            op.execute(f"UPDATE {table} SET {assignments}")
+        with op.batch_alter_table(table) as batch:
+            for column, nullable in columns.items():
+                batch.alter_column(column, type_=new_type(), existing_type=old_type(), existing_nullable=nullable)
+
+
+def _ledger_sum(table: str, column: str, owner: str) -> str:
+    return f"COALESCE((SELECT SUM(t.{column}) FROM {table} t WHERE t.user_id = {owner}), 0)"
+
+
+def upgrade() -> None:
+    _convert(sa.Float, lambda: sa.Numeric(14, 2))
+
+    with op.batch_alter_table("user_stats") as batch:
+        batch.add_column(sa.Column("verified_version", sa.Integer(), nullable=True))
+
+    owner = "user_stats.user_id"
+    op.get_bind().execute(sa.text(
+        "UPDATE user_stats SET "
+        f"total_deposited = {_ledger_sum('deposits', 'amount', owner)}, "
+        f"total_withdrawn = {_ledger_sum('withdrawals', 'amount', owner)}, "
+        f"total_profit = {_ledger_sum('daily_entries', 'profit', owner)}, "
+        f"total_loss = {_ledger_sum('daily_entries', 'loss', owner)}, "
+        "rollups_ready = :not_ready, version = version + 1"
+    ), {"not_ready": False})
+    owner = "users.id"
+    op.execute(
+        "UPDATE users SET active_balance = "
+        f"{_ledger_sum('deposits', 'amount', owner)} - {_ledger_sum('withdrawals', 'amount', owner)} "
+        f"+ {_ledger_sum('daily_entries', 'profit', owner)} - {_ledger_sum('daily_entries', 'loss', owner)}"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("user_stats") as batch:
+        batch.drop_column("verified_version")
+    _convert(lambda: sa.Numeric(14, 2), sa.Float)
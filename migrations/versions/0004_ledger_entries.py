@@ -0,0 +1,70 @@
+"""Append-only ledger_entries table replacing users.active_balance
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+The ledger is backfilled with one entry per deposit, withdrawal and non-zero
+daily entry, with running balances computed by a window function. The
+current balance is then the latest ledger entry, so users.active_balance is
+dropped.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Within a day: deposits, then withdrawals, then the day's profit or loss
+RAW_ENTRIES = (
+    "SELECT user_id, 'deposit' AS entry_type, amount, date AS effective_date, 0 AS kind, id AS source_id "
+    "FROM deposits WHERE amount IS NOT NULL "
+    "UNION ALL SELECT user_id, 'withdrawal', -amount, date, 1, id FROM withdrawals WHERE amount IS NOT NULL "
+    "UNION ALL SELECT user_id, 'daily_entry', profit - loss, date, 2, id FROM daily_entries "
+    "WHERE profit <> loss"
+)
+LEDGER_ORDER = "effective_date, kind, source_id"
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_entries",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("entry_type", sa.String(length=16), nullable=False),
+        sa.Column("amount", sa.Numeric(14, 2), nullable=False),
+        sa.Column("effective_date", sa.Date(), nullable=False),
+        sa.Column("balance", sa.Numeric(14, 2), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_ledger_entries_user_date", "ledger_entries", ["user_id", "effective_date", "id", "balance"]
+    )
+
+    # Rows are inserted in ledger order so ids follow (effective_date, id) order
+    op.execute(
+        "INSERT INTO ledger_entries (user_id, entry_type, amount, effective_date, balance, created_at) "
+        "SELECT user_id, entry_type, amount, effective_date, "
+        f"SUM(amount) OVER (PARTITION BY user_id ORDER BY {LEDGER_ORDER} ROWS UNBOUNDED PRECEDING), "
+        "CURRENT_TIMESTAMP "
+        f"FROM ({RAW_ENTRIES}) raw WHERE user_id IS NOT NULL ORDER BY user_id, {LEDGER_ORDER}"
+    )
+
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("active_balance")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("active_balance", sa.Numeric(14, 2), nullable=True))
+    op.execute(
+        "UPDATE users SET active_balance = COALESCE((SELECT SUM(l.amount) FROM ledger_entries l "
+        "WHERE l.user_id = users.id), 0)"
+    )
+    op.drop_index("ix_ledger_entries_user_date", table_name="ledger_entries")
+    op.drop_table("ledger_entries")
@@ -0,0 +1,83 @@
+"""Keep running balances per month so ledger_entries is append-only
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+ledger_entries.balance held the running balance through each entry, so a
+back-dated write had to rewrite every later entry. It is replaced by
+ledger_months, the closing balance of each month with entries, backfilled
+from the ledger with a window function; ledger_entries rows are no longer
+updated.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+MONTH_START = {
+    "sqlite": "date(effective_date, 'start of month')",
+    "mysql": "DATE_FORMAT(effective_date, '%Y-%m-01')",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ledger_months",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month_start", sa.Date(), nullable=False),
+        sa.Column("balance", sa.Numeric(14, 2), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "month_start"),
+    )
+    month_start = MONTH_START.get(op.get_bind().dialect.name, "CAST(DATE_TRUNC('month', effective_date) AS DATE)")
+    op.execute(
+        "INSERT INTO ledger_months (user_id, month_start, balance) "
+        "SELECT user_id, month_start, "
+        "ROUND(SUM(SUM(amount)) OVER (PARTITION BY user_id ORDER BY month_start ROWS UNBOUNDED PRECEDING), 2) "
+        f"FROM (SELECT user_id, {month_start} AS month_start, amount FROM ledger_entries) entries "
+        "GROUP BY user_id, month_start"
+    )
+
+    op.drop_index("ix_ledger_entries_user_date", table_name="ledger_entries")
+    with op.batch_alter_table("ledger_entries") as batch:
+        batch.drop_column("balance")
+    op.create_index(
+        "ix_ledger_entries_user_date", "ledger_entries", ["user_id", "effective_date", "id", "amount"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ledger_entries_user_date", table_name="ledger_entries")
+    with op.batch_alter_table("ledger_entries") as batch:
+        batch.add_column(sa.Column("balance", sa.Numeric(14, 2), nullable=True))
+
+    ledger = sa.table(
+        "ledger_entries", sa.column("id", sa.Integer), sa.column("user_id", sa.Integer),
+        sa.column("amount", sa.Numeric(14, 2)), sa.column("effective_date", sa.Date),
+        sa.column("balance", sa.Numeric(14, 2)),
+    )
+    bind = op.get_bind()
+    running = {}
+    balances = []
+    for row_id, user_id, amount in bind.execute(sa.select(ledger.c.id, ledger.c.user_id, ledger.c.amount).order_by(
+        ledger.c.user_id, ledger.c.effective_date, ledger.c.id
+    )):
+        running[user_id] = running.get(user_id, 0) + amount
+        balances.append({"row_id": row_id, "running": running[user_id]})
+    if balances:
+        bind.execute(
+            ledger.update().where(ledger.c.id == sa.bindparam("row_id")).values(balance=sa.bindparam("running")),
+            balances,
+        )
+
+    with op.batch_alter_table("ledger_entries") as batch:
+        batch.alter_column("balance", existing_type=sa.Numeric(14, 2), nullable=False)
+    op.create_index(
+        "ix_ledger_entries_user_date", "ledger_entries", ["user_id", "effective_date", "id", "balance"]
+    )
+    op.drop_table("ledger_months")
@@ -0,0 +1,48 @@
+"""Fixtures for the test suite: a freshly migrated SQLite database.
+
+    pip install pytest
+    pytest
+"""
+import os
+import sys
+import tempfile
+from itertools import count
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+# The app reads its settings at import time, so set them before anything imports it
+_scratch = tempfile.mkdtemp(prefix="journal-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ.setdefault("JWT_SECRET", "test")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+
+_usernames = count()
+
+
+@pytest.fixture(scope="session")
+def migrated():
+    from app.database import upgrade_schema
+    upgrade_schema()
+
+
+@pytest.fixture
+def db(migrated):
+    from app.database import SessionLocal
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def user_id(db):
+    """A new user with an empty journal."""
+    from app import crud, schemas
+    name = f"user{next(_usernames)}"
+    user = crud.create_user(
+        db, schemas.UserCreate(email=f"{name}@example.com", username=name, password="x"), hashed_password="x"
+    )
+    return user.id
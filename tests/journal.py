@@ -0,0 +1,78 @@
+"""Random journal writes shared by the consistency tests.
+
+Each step applies one write to a user's journal, drawing everything it needs
+from ``rng`` so that a seed replays the same history.
+"""
+import io
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app import crud, importer, models, schemas
+
+START = date(2023, 12, 1)  # the window spans week, month and year boundaries
+DAYS = 500
+
+
+def random_day(rng: random.Random) -> date:
+    return START + timedelta(days=rng.randrange(DAYS))
+
+
+def random_money(rng: random.Random, high: int) -> Decimal:
+    return Decimal(rng.randint(0, high * 100)) / 100
+
+
+def random_entry(rng: random.Random, day: date) -> schemas.DailyEntryCreate:
+    return schemas.DailyEntryCreate(
+        date=day, profit=random_money(rng, 400), loss=random_money(rng, 300),
+        reason_profit=rng.choice(["plan", None]), reason_loss=rng.choice(["fomo", None]),
+    )
+
+
+def deposit(db, user_id, rng):
+    crud.create_deposit(db, schemas.DepositCreate(date=random_day(rng), amount=random_money(rng, 2000) + 1), user_id)
+
+
+def withdrawal(db, user_id, rng):
+    crud.create_withdrawal(db, schemas.WithdrawalCreate(date=random_day(rng), amount=random_money(rng, 500) + 1), user_id)
+
+
+def upsert(db, user_id, rng):
+    # Mostly back-dated, sometimes onto a day that already has an entry
+    crud.create_daily_entry(db, random_entry(rng, random_day(rng)), user_id)
+
+
+def edit(db, user_id, rng):
+    ids = [row.id for row in db.query(models.DailyEntry.id).filter(models.DailyEntry.user_id == user_id)]
+    if not ids:
+        return
+    try:
+        crud.update_daily_entry(db, rng.choice(ids), random_entry(rng, random_day(rng)), user_id)
+    except crud.EntryDateTaken:
+        pass
+
+
+def import_rows(db, user_id, rng):
+    kind = rng.choice(list(importer.IMPORT_KINDS))
+    if kind == "daily-entries":
+        lines = ["date,profit,loss,reason_profit"]
+        # Repeated days within one file: the last row wins
+        lines += [f"{random_day(rng)},{random_money(rng, 400)},{random_money(rng, 300)},plan"
+                  for _ in range(rng.randint(1, 8))]
+    else:
+        lines = ["date,amount"] + [f"{random_day(rng)},{random_money(rng, 900) + 1}" for _ in range(rng.randint(1, 8))]
+    importer.import_file(db, user_id, kind, io.BytesIO("\n".join(lines).encode()), "csv")
+
+
+def reset(db, user_id, rng):
+    crud.reset_user_data(db, user_id)
+
+
+STEPS_BY_WEIGHT = [(deposit, 3), (withdrawal, 2), (upsert, 6), (edit, 4), (import_rows, 2), (reset, 1)]
+
+
+def random_steps(rng: random.Random, count: int):
+    """Yield ``count`` step functions drawn by weight."""
+    steps, weights = zip(*STEPS_BY_WEIGHT)
+    for _ in range(count):
+        yield rng.choices(steps, weights)[0]
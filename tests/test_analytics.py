@@ -0,0 +1,25 @@
+"""Analytics over a date range must agree with the ledger's balances."""
+import random
+from datetime import timedelta
+
+import pytest
+
+from app import analytics, crud
+from journal import random_day, random_steps
+
+STEPS = 60
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_range_balances_match_ledger(db, user_id, seed):
+    rng = random.Random(seed)
+    for step in random_steps(rng, STEPS):
+        step(db, user_id, rng)
+    for _ in range(20):
+        start, end = sorted((random_day(rng), random_day(rng)))
+        result = analytics.get_analytics(db, user_id, start, end)
+        assert result["opening_balance"] == pytest.approx(float(crud.get_balance(db, user_id, start - timedelta(days=1))))
+        assert result["closing_balance"] == pytest.approx(float(crud.get_balance(db, user_id, end)))
+        curve = {str(point["date"]): float(point["balance"]) for point in crud.get_equity_curve(db, user_id, start, end)}
+        for day, balance in zip(result["equity_curve"]["dates"], result["equity_curve"]["balance"]):
+            assert balance == pytest.approx(curve[day]), day
@@ -0,0 +1,29 @@
+"""Import errors name the physical line of the uploaded file."""
+import io
+
+import pytest
+
+from app import importer
+
+CASES = [
+    ("csv", b"date,amount\n2025-01-01,5\n2025-01-02,abc\n", 3),
+    ("csv", b'date,amount\n"2025-01-01",5\n2025-01-02,\xff\n', 3),
+    ("ndjson", b'{"date": "2025-01-01", "amount": 5}\n\n{"date": "x", "amount": 5}\n', 3),
+    ("ndjson", b'{"date": "2025-01-01", "amount": 5}\n\n{oops\n', 3),
+    ("ndjson", b'\n\n[1]\n', 3),
+    ("ndjson", b'{"date": "2025-01-01", "amount": 5}\n\xff\n', 2),
+]
+
+
+@pytest.mark.parametrize("fmt, body, line", CASES)
+def test_errors_report_file_line(db, user_id, fmt, body, line):
+    with pytest.raises(importer.ImportRowError) as error:
+        importer.import_file(db, user_id, "deposits", io.BytesIO(body), fmt)
+    assert error.value.line == line
+    assert str(error.value).startswith(f"Line {line}: ")
+
+
+def test_quoted_newlines_and_bom(db, user_id):
+    body = '\ufeffdate,profit,reason_profit\r\n2025-01-01,5,"two\nlines"\r\n'.encode()
+    result = importer.import_file(db, user_id, "daily-entries", io.BytesIO(body), "csv")
+    assert result["rows"] == 1
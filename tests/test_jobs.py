@@ -0,0 +1,31 @@
+"""Stopping the insights precomputer leaves no job running."""
+import asyncio
+
+from app import jobs
+
+
+def test_stop_cancels_running_jobs(migrated, monkeypatch):
+    started = []
+
+    async def slow_build(db, user_id, year, month, use_stored=True):
+        started.append((user_id, year, month))
+        await asyncio.sleep(60)
+        return {}, True
+
+    monkeypatch.setattr(jobs, "build_monthly_insights", slow_build)
+    monkeypatch.setattr(jobs, "gemini_configured", lambda: True)
+    precomputer = jobs.InsightsPrecomputer(debounce=0, concurrency=2)
+
+    async def scenario():
+        precomputer.start()
+        for month in (1, 2):
+            precomputer.schedule(1, 2025, month)
+        while len(started) < 2:
+            await asyncio.sleep(0.01)
+        await precomputer.stop()
+        assert not precomputer._jobs
+        assert precomputer.running == 0
+        assert precomputer.completed == precomputer.failed == 0
+        assert not precomputer._due
+
+    asyncio.run(asyncio.wait_for(scenario(), 10))
@@ -0,0 +1,62 @@
+"""The ledger is append-only and its month balances always match it.
+
+Each run applies a seeded random mix of journal writes and, after every step,
+checks balances and equity curves against the raw tables.
+"""
+import random
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app import crud
+from app.maintenance import _ledger_problems
+from journal import DAYS, START, random_day, random_steps
+
+STEPS = 60
+
+
+def balances_by_day(db, user_id) -> dict:
+    """Closing balance of each day with raw rows, summed from the raw tables."""
+    balance = crud.ZERO
+    closing = {}
+    for day, _, amount in crud.compute_user_ledger(db, user_id):
+        balance += amount
+        closing[day] = balance
+    return closing
+
+
+def balance_on(closing: dict, day) -> crud.Decimal:
+    return next((closing[d] for d in sorted(closing, reverse=True) if d <= day), crud.ZERO)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_ledger_matches_raw_tables(db, user_id, seed):
+    rng = random.Random(seed)
+    statements = []
+    bind = db.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        for i, step in enumerate(random_steps(rng, STEPS)):
+            step(db, user_id, rng)
+            where = f"step {i}: {step.__name__}"
+            assert _ledger_problems(db, user_id, crud.compute_user_totals(db, user_id)) == [], where
+
+            closing = balances_by_day(db, user_id)
+            assert crud.get_balance(db, user_id) == balance_on(closing, START + timedelta(days=DAYS)), where
+            for day in (random_day(rng), random_day(rng).replace(day=1), START - timedelta(days=1)):
+                assert crud.get_balance(db, user_id, day) == balance_on(closing, day), f"{where}, {day}"
+
+            start, end = sorted((random_day(rng), random_day(rng)))
+            curve = {point["date"]: point["balance"] for point in crud.get_equity_curve(db, user_id, start, end)}
+            # Days whose entries were later reverted stay on the curve at an unchanged balance
+            assert curve == {day: balance_on(closing, day) for day in curve}, where
+            assert {day for day in closing if start <= day <= end} <= curve.keys(), where
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+    assert not [s for s in statements if s.lstrip().upper().startswith("UPDATE LEDGER_ENTRIES")]
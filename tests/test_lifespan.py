@@ -0,0 +1,15 @@
+"""The app can be started and stopped more than once in one process."""
+import logging
+
+from fastapi.testclient import TestClient
+
+from app import log
+
+
+def test_logging_runs_in_every_lifespan(migrated):
+    from app.main import app
+    for _ in range(2):
+        with TestClient(app):
+            assert log._listener is not None
+            assert log._handler in logging.getLogger().handlers
+    assert log._handler not in logging.getLogger().handlers
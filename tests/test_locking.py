@@ -0,0 +1,59 @@
+"""Each journal write takes the user's lock exactly once."""
+import io
+from datetime import date
+
+import pytest
+from sqlalchemy import event
+
+from app import crud, importer, schemas
+
+DAY = date(2025, 3, 14)
+
+
+def new_entry(db, user_id):
+    return crud.create_daily_entry(db, schemas.DailyEntryCreate(date=DAY, profit=5, loss=1), user_id)
+
+
+# name -> (setup returning the write's arguments, write)
+WRITES = {
+    "create_deposit": (lambda db, uid: (), lambda db, uid: crud.create_deposit(
+        db, schemas.DepositCreate(date=DAY, amount=10), uid)),
+    "create_withdrawal": (lambda db, uid: (), lambda db, uid: crud.create_withdrawal(
+        db, schemas.WithdrawalCreate(date=DAY, amount=1), uid)),
+    "create_daily_entry": (new_entry, lambda db, uid, previous: new_entry(db, uid)),
+    "update_daily_entry": (new_entry, lambda db, uid, entry: crud.update_daily_entry(
+        db, entry.id, schemas.DailyEntryCreate(date=DAY, profit=7), uid)),
+    "import_file": (lambda db, uid: (), lambda db, uid: importer.import_file(
+        db, uid, "daily-entries", io.BytesIO(b"date,profit\n2025-03-14,3\n2025-03-15,4\n"), "csv")),
+    "reset_user_data": (new_entry, lambda db, uid, entry: crud.reset_user_data(db, uid)),
+}
+
+
+@pytest.mark.parametrize("name", WRITES)
+def test_write_locks_user_once(db, user_id, name):
+    setup, write = WRITES[name]
+    args = setup(db, user_id)
+    args = args if isinstance(args, tuple) else (args,)
+    locks = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE USERS"):
+            locks.append(statement)
+
+    bind = db.get_bind()
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        write(db, user_id, *args)
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+    assert len(locks) == 1
+
+
+def test_lock_ends_open_transaction(db, user_id):
+    # As authentication does on an identity cache miss, before the write locks
+    crud.get_user(db, user_id)
+    before = db.get_transaction()
+    assert before is not None
+    crud.lock_user(db, user_id)
+    assert db.get_transaction() is not before
+    db.rollback()
@@ -0,0 +1,21 @@
+"""Connection pool metrics must keep working after the engine's pool is replaced."""
+from sqlalchemy import create_engine, text
+
+from app import metrics
+
+
+def checkouts_timed() -> float:
+    return next(
+        sample.value for sample in metrics.POOL_WAIT_SECONDS.collect()[0].samples if sample.name.endswith("_count")
+    )
+
+
+def test_pool_wait_survives_dispose():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    for _ in range(2):
+        before = checkouts_timed()
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        assert checkouts_timed() == before + 1
+        engine.dispose()
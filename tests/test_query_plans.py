@@ -0,0 +1,27 @@
+"""The dashboard read paths must be served by the (user_id, date) indexes."""
+from datetime import date, timedelta
+
+from app import crud, schemas
+from app.maintenance import _is_full_scan, dashboard_query_plans
+
+
+def test_dashboard_reads_use_indexes(db, user_id):
+    today = date.today()
+    days = [today - timedelta(days=i) for i in range(90)]
+    crud.lock_user(db, user_id)
+    crud.bulk_upsert_daily_entries(db, [
+        schemas.DailyEntryCreate(date=day, profit=i % 7, loss=i % 5, reason_profit="plan")
+        for i, day in enumerate(days)
+    ], user_id)
+    crud.bulk_create_deposits(db, [schemas.DepositCreate(date=day, amount=100) for day in days[::10]], user_id)
+    crud.bulk_create_withdrawals(db, [schemas.WithdrawalCreate(date=day, amount=10) for day in days[::30]], user_id)
+    db.commit()
+
+    dialect = db.get_bind().dialect.name
+    scans = [
+        (name, tuple(row))
+        for name, _, rows in dashboard_query_plans(db, user_id)
+        for row in rows
+        if _is_full_scan(dialect, row)
+    ]
+    assert scans == []